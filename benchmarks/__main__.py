@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.load import MIXES, compare, run_load
+
+
+def current_commit():
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip() or None
+
+
+async def run_seed(args):
+    # Importados aqui: run e compare não precisam das variaveis do banco.
+    from benchmarks.seed import seed_catalog  # noqa: PLC0415
+    from madr.database import engine  # noqa: PLC0415
+
+    async with AsyncSession(engine) as session:
+        await seed_catalog(
+            session,
+            romancistas=args.romancistas,
+            livros=args.livros,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+
+    await engine.dispose()
+
+
+def seed(args):
+    if not args.yes:
+        sys.exit(
+            'O seed apaga todas as tabelas do DATABASE_URL; '
+            'confirme com --yes'
+        )
+
+    asyncio.run(run_seed(args))
+    print(f'{args.romancistas} romancistas e {args.livros} livros criados')
+
+
+def run(args):
+    report = asyncio.run(
+        run_load(
+            base_url=args.base_url,
+            romancistas=args.romancistas,
+            livros=args.livros,
+            mix=args.mix,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            seed=args.seed,
+        )
+    )
+    report = {'commit': current_commit(), **report}
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+
+    print(output)
+
+
+def diff(args):
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.current, encoding='utf-8') as file:
+        current = json.load(file)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+
+    print(f'{"endpoint":<34} {"rps":>8} {"p50":>8} {"p95":>8} {"p99":>8}')
+    for row in rows:
+        print(
+            f'{row["endpoint"]:<34} {row["rps"]:>+7.1f}% '
+            f'{row["p50_ms"]:>+7.1f}% {row["p95_ms"]:>+7.1f}% '
+            f'{row["p99_ms"]:>+7.1f}%'
+        )
+
+    if regressions:
+        print(
+            f'p95 piorou mais de {args.threshold}%: {", ".join(regressions)}'
+        )
+        sys.exit(1)
+
+
+def add_catalog_arguments(parser):
+    parser.add_argument('--romancistas', type=int, default=50000)
+    parser.add_argument('--livros', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser(
+        'seed', help='Recria o catalogo sintetico no DATABASE_URL'
+    )
+    add_catalog_arguments(seed_parser)
+    seed_parser.add_argument('--batch-size', type=int, default=10000)
+    seed_parser.add_argument(
+        '--yes',
+        action='store_true',
+        help='Confirma que o banco pode ser apagado',
+    )
+    seed_parser.set_defaults(func=seed)
+
+    run_parser = commands.add_parser(
+        'run', help='Gera carga na API e mede latencia e vazao por rota'
+    )
+    add_catalog_arguments(run_parser)
+    run_parser.add_argument('--base-url', default='http://localhost:8000')
+    run_parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    run_parser.add_argument('--concurrency', type=int, default=32)
+    run_parser.add_argument('--duration', type=float, default=30)
+    run_parser.add_argument('--warmup', type=float, default=5)
+    run_parser.add_argument('--output')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        'compare', help='Compara dois relatorios do run'
+    )
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10)
+    compare_parser.set_defaults(func=diff)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+import random
+
+import factory
+
+from madr.models import Livro, Romancista
+
+
+class RomancistaFactory(factory.Factory):
+    class Meta:
+        model = Romancista
+
+    nome = factory.Sequence(lambda n: f'nome={n}')
+
+
+class LivroFactory(factory.Factory):
+    class Meta:
+        model = Livro
+
+    ano = factory.LazyFunction(lambda: random.randint(1500, 2024))
+    titulo = factory.Sequence(lambda n: f'titulo={n}')
+    romancista_id = 1
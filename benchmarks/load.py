@@ -0,0 +1,238 @@
+import asyncio
+import random
+from collections import defaultdict
+from itertools import count
+from math import ceil
+from time import perf_counter
+
+import httpx
+
+BENCHMARK_USER = {
+    'username': 'benchmark',
+    'email': 'benchmark@madr.com',
+    'password': 'benchmark',
+}
+
+# Pesos de cada operação por tipo de carga; o nome é o da rota, para que o
+# relatório bata com as métricas de /metrics. O POST /auth/token esbarra no
+# limite de taxa: meça com a API rodando com RATE_LIMIT_ENABLED=false.
+MIXES = {
+    'read': {
+        'GET /livro/': 40,
+        'GET /livro/{livro_id}': 30,
+        'GET /romancista/': 15,
+        'GET /romancista/{romancista_id}': 15,
+    },
+    'mixed': {
+        'GET /livro/': 35,
+        'GET /livro/{livro_id}': 25,
+        'GET /romancista/': 12,
+        'GET /romancista/{romancista_id}': 12,
+        'POST /livro/': 6,
+        'PATCH /livro/{livro_id}': 6,
+        'POST /romancista/': 2,
+        'POST /auth/token': 2,
+    },
+    'write': {
+        'POST /livro/': 40,
+        'PATCH /livro/{livro_id}': 40,
+        'POST /romancista/': 15,
+        'POST /auth/token': 5,
+    },
+}
+
+
+class Catalog:
+    def __init__(self, romancistas: int, livros: int, run_id: str):
+        self.romancistas = romancistas
+        self.livros = livros
+        self.run_id = run_id
+        self.sequence = count()
+        self.headers = {}
+
+    def romancista_id(self):
+        return random.randint(1, self.romancistas)
+
+    def livro_id(self):
+        return random.randint(1, self.livros)
+
+    def unique(self, prefix: str):
+        return f'{prefix} {self.run_id} {next(self.sequence)}'
+
+
+def login(client: httpx.AsyncClient, catalog: Catalog):
+    return client.post(
+        '/auth/token',
+        data={
+            'username': BENCHMARK_USER['email'],
+            'password': BENCHMARK_USER['password'],
+        },
+    )
+
+
+OPERATIONS = {
+    'GET /livro/': lambda client, catalog: client.get(
+        '/livro/',
+        params={'limit': 20, 'romancista_id': catalog.romancista_id()},
+    ),
+    'GET /livro/{livro_id}': lambda client, catalog: client.get(
+        f'/livro/{catalog.livro_id()}'
+    ),
+    'GET /romancista/': lambda client, catalog: client.get(
+        '/romancista/', params={'limit': 20, 'order_by': 'nome'}
+    ),
+    'GET /romancista/{romancista_id}': lambda client, catalog: client.get(
+        f'/romancista/{catalog.romancista_id()}'
+    ),
+    'POST /livro/': lambda client, catalog: client.post(
+        '/livro/',
+        headers=catalog.headers,
+        json={
+            'ano': random.randint(1500, 2024),
+            'titulo': catalog.unique('benchmark'),
+            'romancista_id': catalog.romancista_id(),
+        },
+    ),
+    'PATCH /livro/{livro_id}': lambda client, catalog: client.patch(
+        f'/livro/{catalog.livro_id()}',
+        headers=catalog.headers,
+        json={'ano': random.randint(1500, 2024)},
+    ),
+    'POST /romancista/': lambda client, catalog: client.post(
+        '/romancista/',
+        headers=catalog.headers,
+        json={'nome': catalog.unique('benchmark')},
+    ),
+    'POST /auth/token': login,
+}
+
+
+def percentile(values, fraction: float):
+    # Nearest-rank sobre a lista ordenada; o round evita que 0.95 * 100
+    # vire 95.00000000000001 e suba uma posição.
+    rank = ceil(round(fraction * len(values), 6))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def summarize(latencies: dict, errors: dict, elapsed: float):
+    endpoints = {}
+
+    for name in sorted(latencies.keys() | errors.keys()):
+        values = sorted(latencies[name])
+        summary = {
+            'requests': len(values) + errors[name],
+            'errors': errors[name],
+            'rps': round(len(values) / elapsed, 2),
+        }
+
+        if values:
+            summary |= {
+                f'p{int(fraction * 100)}_ms': round(
+                    percentile(values, fraction) * 1000, 2
+                )
+                for fraction in (0.5, 0.95, 0.99)
+            }
+            summary['mean_ms'] = round(sum(values) / len(values) * 1000, 2)
+
+        endpoints[name] = summary
+
+    return endpoints
+
+
+async def worker(client, catalog, mix, window, results):
+    names, weights = zip(*mix.items())
+    warmup, deadline = window
+    latencies, errors = results
+
+    while (now := perf_counter()) < deadline:
+        name = random.choices(names, weights)[0]
+        start = perf_counter()
+
+        try:
+            response = await OPERATIONS[name](client, catalog)
+            failed = response.is_error
+        except httpx.HTTPError:
+            failed = True
+
+        if now < warmup:
+            continue
+
+        if failed:
+            errors[name] += 1
+        else:
+            latencies[name].append(perf_counter() - start)
+
+
+async def run_load(  # noqa: PLR0913, PLR0917
+    base_url: str,
+    romancistas: int,
+    livros: int,
+    mix: str = 'mixed',
+    concurrency: int = 32,
+    duration: float = 30,
+    warmup: float = 5,
+    seed: int = 42,
+):
+    random.seed(seed)
+    catalog = Catalog(romancistas, livros, run_id=f'{seed}-{random.random()}')
+    latencies, errors = defaultdict(list), defaultdict(int)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=30,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+        response = await login(client, catalog)
+        response.raise_for_status()
+        token = response.json()['access_token']
+        catalog.headers = {'Authorization': f'Bearer {token}'}
+
+        start = perf_counter()
+        await asyncio.gather(
+            *(
+                worker(
+                    client,
+                    catalog,
+                    MIXES[mix],
+                    (start + warmup, start + warmup + duration),
+                    (latencies, errors),
+                )
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = perf_counter() - start - warmup
+
+    return {
+        'config': {
+            'base_url': base_url,
+            'mix': mix,
+            'concurrency': concurrency,
+            'duration': duration,
+            'warmup': warmup,
+            'seed': seed,
+            'romancistas': romancistas,
+            'livros': livros,
+        },
+        'elapsed': round(elapsed, 2),
+        'endpoints': summarize(latencies, errors, elapsed),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    rows, regressions = [], []
+
+    for name, after in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+
+        if not before or 'p95_ms' not in before or 'p95_ms' not in after:
+            continue
+
+        row = {'endpoint': name}
+        for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            row[key] = round((after[key] / before[key] - 1) * 100, 1)
+        rows.append(row)
+
+        if row['p95_ms'] > threshold:
+            regressions.append(name)
+
+    return rows, regressions
@@ -0,0 +1,78 @@
+import random
+
+import factory.random
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.factories import LivroFactory, RomancistaFactory
+from benchmarks.load import BENCHMARK_USER
+from madr.models import Livro, Romancista, User
+from madr.security import get_password_hash
+from madr.stats import rebuild_stats
+
+
+def batches(total: int, size: int):
+    for start in range(0, total, size):
+        yield min(size, total - start)
+
+
+async def seed_catalog(
+    session: AsyncSession,
+    romancistas: int,
+    livros: int,
+    seed: int = 42,
+    batch_size: int = 10000,
+):
+    # Mesma semente, mesmo catálogo: os ids começam em 1 e os valores das
+    # factories se repetem, então duas rodadas medem os mesmos dados.
+    random.seed(seed)
+    factory.random.reseed_random(seed)
+    RomancistaFactory.reset_sequence()
+    LivroFactory.reset_sequence()
+
+    await session.execute(
+        text(
+            'TRUNCATE livros, romancista, users, livros_por_ano, '
+            'livros_por_romancista RESTART IDENTITY CASCADE'
+        )
+    )
+
+    for size in batches(romancistas, batch_size):
+        await session.execute(
+            insert(Romancista),
+            [
+                {'nome': romancista.nome}
+                for romancista in RomancistaFactory.build_batch(size)
+            ],
+        )
+
+    romancista_ids = (
+        await session.scalars(select(Romancista.id).order_by(Romancista.id))
+    ).all()
+
+    for size in batches(livros, batch_size):
+        await session.execute(
+            insert(Livro),
+            [
+                {
+                    'ano': livro.ano,
+                    'titulo': livro.titulo,
+                    'romancista_id': livro.romancista_id,
+                }
+                for livro in (
+                    LivroFactory.build(
+                        romancista_id=random.choice(romancista_ids)
+                    )
+                    for _ in range(size)
+                )
+            ],
+        )
+
+    await session.execute(
+        insert(User).values(
+            username=BENCHMARK_USER['username'],
+            email=BENCHMARK_USER['email'],
+            password=get_password_hash(BENCHMARK_USER['password']),
+        )
+    )
+    await rebuild_stats(session)
@@ -1,14 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from madr.routers import auth, livro, romancista, users
+from madr.database import stick_to_primary
+from madr.hashing import hashing_pool
+from madr.metrics import track_requests
+from madr.profiling import profile_requests
+from madr.routers import (
+    admin,
+    auth,
+    livro,
+    metrics,
+    romancista,
+    stats,
+    users,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    hashing_pool.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware('http')(track_requests)
+app.middleware('http')(profile_requests)
+app.middleware('http')(stick_to_primary)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(romancista.router)
 app.include_router(livro.router)
+app.include_router(admin.router)
+app.include_router(stats.router)
+app.include_router(metrics.router)
 
 
 @app.get('/')
-def read_root():
+async def read_root():
     return {'message': 'test'}
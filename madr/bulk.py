@@ -0,0 +1,397 @@
+import csv
+import json
+from collections import defaultdict
+from http import HTTPStatus
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from slugify import slugify
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.database import DIALECT_INSERTS
+from madr.models import Livro, Romancista
+from madr.stats import move_livros, track_livros
+
+BATCH_SIZE = 1000
+
+
+def insert_ignoring_conflicts(session: AsyncSession, table, column: str):
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING: as linhas em conflito
+    # simplesmente não voltam, sem abortar o resto do lote (COPY abortaria).
+    insert = DIALECT_INSERTS[session.bind.dialect.name]
+    return insert(table).on_conflict_do_nothing(index_elements=[column])
+
+
+async def iter_lines(request: Request):
+    buffer = b''
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line
+
+    if buffer:
+        yield buffer
+
+
+async def read_rows(request: Request, schema: type[BaseModel]):
+    content_type = request.headers.get('content-type', '')
+
+    if content_type.startswith('text/csv'):
+        parse = None
+    elif content_type.startswith((
+        'application/x-ndjson',
+        'application/jsonl',
+    )):
+        parse = json.loads
+    else:
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail='Envie text/csv ou application/x-ndjson',
+        )
+
+    header = None
+    line_number = 0
+
+    async for raw_line in iter_lines(request):
+        line_number += 1
+        line = raw_line.decode('utf-8', errors='replace').strip()
+
+        if not line:
+            continue
+
+        try:
+            if parse:
+                data = parse(line)
+            elif header is None:
+                header = next(csv.reader([line]))
+                continue
+            else:
+                data = dict(zip(header, next(csv.reader([line]))))
+
+            yield line_number, schema.model_validate(data)
+
+        except (ValueError, ValidationError):
+            yield line_number, None
+
+
+async def batches(rows, size: int = BATCH_SIZE):
+    batch = []
+
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def conflict(line: int, detail: str):
+    return {'line': line, 'detail': detail}
+
+
+async def resolve_romancistas(session: AsyncSession, nomes: set[str]):
+    query = select(Romancista.nome, Romancista.id)
+    ids = dict(
+        (await session.execute(query.where(Romancista.nome.in_(nomes)))).all()
+    )
+    missing = nomes - ids.keys()
+    created = {}
+
+    if missing:
+        result = await session.execute(
+            insert_ignoring_conflicts(session, Romancista.__table__, 'nome')
+            .values([{'nome': nome} for nome in sorted(missing)])
+            .returning(Romancista.nome, Romancista.id)
+        )
+        created = dict(result.all())
+        ids.update(created)
+
+    if len(ids) < len(nomes):
+        # Criados por outra requisição entre o SELECT e o INSERT.
+        result = await session.execute(
+            query.where(Romancista.nome.in_(nomes - ids.keys()))
+        )
+        ids.update(result.all())
+
+    return ids, len(created)
+
+
+async def insert_livros(session: AsyncSession, pending: dict):
+    # pending: titulo -> (linha, valores); devolve os conflitos do lote.
+    inserted = set(
+        await session.scalars(
+            insert_ignoring_conflicts(session, Livro.__table__, 'titulo')
+            .values([values for _, values in pending.values()])
+            .returning(Livro.titulo)
+        )
+    )
+
+    conflicts = [
+        conflict(line, 'Livro ja consta no MADR')
+        for titulo, (line, _) in pending.items()
+        if titulo not in inserted
+    ]
+    await track_livros(
+        session,
+        [
+            (values['ano'], values['romancista_id'])
+            for titulo, (_, values) in pending.items()
+            if titulo in inserted
+        ],
+    )
+
+    return len(inserted), conflicts
+
+
+async def import_livros(session: AsyncSession, rows):
+    report = {'inserted': 0, 'created_romancistas': 0, 'conflicts': []}
+
+    async for batch in batches(rows):
+        valid = []
+        for line, row in batch:
+            titulo = slugify(row.titulo, separator=' ') if row else ''
+            nome = slugify(row.romancista, separator=' ') if row else ''
+
+            if not titulo or not nome:
+                report['conflicts'].append(conflict(line, 'Linha invalida'))
+                continue
+
+            valid.append((line, row.ano, titulo, nome))
+
+        if not valid:
+            continue
+
+        romancistas, created = await resolve_romancistas(
+            session, {nome for *_, nome in valid}
+        )
+        report['created_romancistas'] += created
+
+        pending = {}
+        for line, ano, titulo, nome in valid:
+            if titulo in pending:
+                report['conflicts'].append(
+                    conflict(line, 'Titulo repetido no arquivo')
+                )
+                continue
+
+            pending[titulo] = (
+                line,
+                {
+                    'ano': ano,
+                    'titulo': titulo,
+                    'romancista_id': romancistas[nome],
+                },
+            )
+
+        inserted, conflicts = await insert_livros(session, pending)
+        report['inserted'] += inserted
+        report['conflicts'] += conflicts
+
+        await session.commit()
+
+    report['conflicts'].sort(key=lambda item: item['line'])
+    return report
+
+
+async def import_romancistas(session: AsyncSession, rows):
+    report = {'inserted': 0, 'conflicts': []}
+
+    async for batch in batches(rows):
+        pending = {}
+        for line, row in batch:
+            nome = slugify(row.nome, separator=' ') if row else ''
+
+            if not nome:
+                report['conflicts'].append(conflict(line, 'Linha invalida'))
+            elif nome in pending:
+                report['conflicts'].append(
+                    conflict(line, 'Nome repetido no arquivo')
+                )
+            else:
+                pending[nome] = line
+
+        if not pending:
+            continue
+
+        inserted = set(
+            await session.scalars(
+                insert_ignoring_conflicts(
+                    session, Romancista.__table__, 'nome'
+                )
+                .values([{'nome': nome} for nome in pending])
+                .returning(Romancista.nome)
+            )
+        )
+        report['inserted'] += len(inserted)
+        report['conflicts'] += [
+            conflict(line, 'Romancista ja consta no MADR')
+            for nome, line in pending.items()
+            if nome not in inserted
+        ]
+
+        await session.commit()
+
+    report['conflicts'].sort(key=lambda item: item['line'])
+    return report
+
+
+def item_result(status: HTTPStatus, livro=None, detail: str | None = None):
+    return {'status': status, 'livro': livro, 'detail': detail}
+
+
+async def create_livros(session: AsyncSession, livros):
+    results = [None] * len(livros)
+    romancistas = set(
+        await session.scalars(
+            select(Romancista.id).where(
+                Romancista.id.in_({livro.romancista_id for livro in livros})
+            )
+        )
+    )
+
+    pending = {}
+    for index, livro in enumerate(livros):
+        titulo = slugify(livro.titulo, separator=' ')
+
+        if livro.romancista_id not in romancistas:
+            results[index] = item_result(
+                HTTPStatus.NOT_FOUND, detail='Romancista nao consta no MADR'
+            )
+        elif titulo in pending:
+            results[index] = item_result(
+                HTTPStatus.CONFLICT, detail='Titulo repetido no lote'
+            )
+        else:
+            pending[titulo] = (
+                index,
+                {
+                    'ano': livro.ano,
+                    'titulo': titulo,
+                    'romancista_id': livro.romancista_id,
+                },
+            )
+
+    created = {}
+    if pending:
+        # Lista de parâmetros: executemany, que o SQLAlchemy agrupa em
+        # INSERT ... VALUES (...), (...) RETURNING (insertmanyvalues).
+        rows = await session.execute(
+            insert_ignoring_conflicts(
+                session, Livro.__table__, 'titulo'
+            ).returning(*Livro.__table__.c),
+            [values for _, values in pending.values()],
+        )
+        created = {row.titulo: row._asdict() for row in rows}
+        await track_livros(
+            session,
+            [(row['ano'], row['romancista_id']) for row in created.values()],
+        )
+        await session.commit()
+
+    for titulo, (index, _) in pending.items():
+        results[index] = (
+            item_result(HTTPStatus.OK, livro=created[titulo])
+            if titulo in created
+            else item_result(
+                HTTPStatus.CONFLICT, detail='Livro ja consta no MADR'
+            )
+        )
+
+    return {'results': results}
+
+
+async def patch_livros(session: AsyncSession, livros):
+    results = [None] * len(livros)
+    ids = {livro.id for livro in livros}
+    titulos = {
+        slugify(livro.titulo, separator=' ')
+        for livro in livros
+        if livro.titulo
+    }
+    current = (
+        await session.execute(
+            select(Livro.id, Livro.ano, Livro.titulo).where(
+                or_(Livro.id.in_(ids), Livro.titulo.in_(titulos))
+            )
+        )
+    ).all()
+    anos = {row.id: row.ano for row in current if row.id in ids}
+    owners = {row.titulo: row.id for row in current}
+
+    pending = {}
+    taken = set()
+    for index, livro in enumerate(livros):
+        changes = livro.model_dump(exclude_none=True, exclude={'id'})
+        if 'titulo' in changes:
+            changes['titulo'] = slugify(changes['titulo'], separator=' ')
+        titulo = changes.get('titulo')
+
+        if livro.id not in anos:
+            results[index] = item_result(
+                HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
+            )
+        elif livro.id in pending:
+            results[index] = item_result(
+                HTTPStatus.CONFLICT, detail='Livro repetido no lote'
+            )
+        elif titulo and (
+            owners.get(titulo, livro.id) != livro.id or titulo in taken
+        ):
+            results[index] = item_result(
+                HTTPStatus.CONFLICT, detail='Este titulo ja consta no MADR'
+            )
+        else:
+            pending[livro.id] = (index, changes)
+            taken.add(titulo)
+
+    if pending:
+        # Um executemany por conjunto de campos alterados
+        groups = defaultdict(list)
+        for livro_id, (_, changes) in pending.items():
+            groups[tuple(sorted(changes))].append({
+                'b_id': livro_id,
+                **{f'b_{key}': value for key, value in changes.items()},
+            })
+
+        table = Livro.__table__
+        for keys, params in groups.items():
+            await session.execute(
+                update(table)
+                .where(table.c.id == bindparam('b_id'))
+                .values(
+                    version_id=table.c.version_id + 1,
+                    **{key: bindparam(f'b_{key}') for key in keys},
+                ),
+                params,
+            )
+
+        rows = await session.execute(
+            select(*table.c).where(table.c.id.in_(pending))
+        )
+        updated = {row.id: row._asdict() for row in rows}
+        await move_livros(
+            session,
+            [
+                (anos[livro_id], livro['ano'])
+                for livro_id, livro in updated.items()
+            ],
+        )
+        await session.commit()
+
+        # Livro apagado por outra requisição entre o SELECT inicial e o
+        # UPDATE: o UPDATE não o encontrou e ele não volta aqui.
+        for livro_id, (index, _) in pending.items():
+            results[index] = (
+                item_result(HTTPStatus.OK, livro=updated[livro_id])
+                if livro_id in updated
+                else item_result(
+                    HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
+                )
+            )
+
+    return {'results': results}
@@ -0,0 +1,158 @@
+import json
+from collections import OrderedDict
+from math import ceil
+from time import monotonic
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+
+        if entry is None or entry[0] <= monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def status(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        self.generations = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl: float | None = None):
+        self.entries.set(key, value, ttl)
+
+    def generation(self, tag):
+        return self.generations.get(tag, 0)
+
+    def bump(self, tag):
+        self.generations[tag] = self.generation(tag) + 1
+
+    def clear(self):
+        self.entries.clear()
+        self.generations.clear()
+
+
+class SharedBackend:
+    # Usa o subconjunto da API do redis-py (get, set com ex, incr), então
+    # qualquer cliente compatível pode ser plugado no lugar do LocalStore.
+    def __init__(self, client, ttl: float, prefix: str = 'madr:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(f'{self.prefix}{key}')
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl: float | None = None):
+        self.client.set(
+            f'{self.prefix}{key}',
+            json.dumps(value),
+            ex=ceil(self.ttl if ttl is None else ttl),
+        )
+
+    def generation(self, tag):
+        return int(self.client.get(f'{self.prefix}gen:{tag}') or 0)
+
+    def bump(self, tag):
+        self.client.incr(f'{self.prefix}gen:{tag}')
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class LocalStore:
+    def __init__(self):
+        self._data = {}
+
+    def get(self, name):
+        value, expires = self._data.get(name, (None, None))
+
+        if expires is not None and expires <= monotonic():
+            del self._data[name]
+            return None
+
+        return value
+
+    def set(self, name, value, ex=None):
+        self._data[name] = (value, None if ex is None else monotonic() + ex)
+
+    def incr(self, name):
+        value = int(self.get(name) or 0) + 1
+        self._data[name] = (str(value), None)
+        return value
+
+    def flushdb(self):
+        self._data.clear()
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def key(self, namespace: str, tags, params: dict):
+        # As gerações das tags fazem parte da chave: invalidar é só avançar
+        # a geração, e as entradas antigas expiram sozinhas pelo TTL.
+        generations = '.'.join(
+            str(self.backend.generation(tag)) for tag in tags
+        )
+        query = json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+        return f'{namespace}:{generations}:{query}'
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl: float | None = None):
+        self.backend.set(key, value, ttl)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.bump(tag)
+
+    def clear(self):
+        self.backend.clear()
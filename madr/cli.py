@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import os
+from statistics import median
+from time import perf_counter
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CALIBRATION_PASSWORD = 'calibracao-madr'
+
+
+def measure_verify(hasher: Argon2Hasher, samples: int):
+    password_hash = hasher.hash(CALIBRATION_PASSWORD)
+    timings = []
+
+    for _ in range(samples):
+        start = perf_counter()
+        hasher.verify(CALIBRATION_PASSWORD, password_hash)
+        timings.append(perf_counter() - start)
+
+    return median(timings) * 1000
+
+
+def calibrate_argon2(  # noqa: PLR0913, PLR0917
+    target_ms: float,
+    parallelism: int,
+    min_memory: int,
+    max_memory: int,
+    max_time_cost: int,
+    samples: int,
+):
+    # Primeiro dobra a memória enquanto time_cost=1 couber no alvo, depois
+    # aumenta o time_cost com a memória escolhida.
+    def verify_ms(time_cost, memory_cost):
+        hasher = Argon2Hasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+        )
+        return measure_verify(hasher, samples)
+
+    memory_cost = min_memory
+    while (
+        memory_cost * 2 <= max_memory
+        and verify_ms(1, memory_cost * 2) <= target_ms
+    ):
+        memory_cost *= 2
+
+    time_cost = 1
+    while (
+        time_cost < max_time_cost
+        and verify_ms(time_cost + 1, memory_cost) <= target_ms
+    ):
+        time_cost += 1
+
+    return {
+        'time_cost': time_cost,
+        'memory_cost': memory_cost,
+        'parallelism': parallelism,
+        'verify_ms': verify_ms(time_cost, memory_cost),
+    }
+
+
+def calibrate(args):
+    result = calibrate_argon2(
+        target_ms=args.target_ms,
+        parallelism=args.parallelism,
+        min_memory=args.min_memory,
+        max_memory=args.max_memory,
+        max_time_cost=args.max_time_cost,
+        samples=args.samples,
+    )
+
+    print(f'ARGON2_TIME_COST={result["time_cost"]}')
+    print(f'ARGON2_MEMORY_COST={result["memory_cost"]}')
+    print(f'ARGON2_PARALLELISM={result["parallelism"]}')
+    print(f'# verify: {result["verify_ms"]:.1f} ms (alvo {args.target_ms} ms)')
+
+
+async def run_rebuild_stats():
+    # Importados aqui: o calibrate roda sem .env, mas o banco exige as
+    # variaveis de conexão já no import.
+    from madr.database import engine  # noqa: PLC0415
+    from madr.stats import rebuild_stats  # noqa: PLC0415
+
+    async with AsyncSession(engine) as session:
+        await rebuild_stats(session)
+
+    await engine.dispose()
+
+
+def stats(args):
+    asyncio.run(run_rebuild_stats())
+    print('Estatisticas recalculadas')
+
+
+async def run_seed(args):
+    from madr.database import engine  # noqa: PLC0415
+    from madr.security import get_password_hash  # noqa: PLC0415
+    from madr.seed import seed_database  # noqa: PLC0415
+
+    # Um único hash para todos os usuários: o Argon2 por linha levaria
+    # horas em milhões de usuários.
+    password_hash = get_password_hash(args.password)
+
+    async with AsyncSession(engine) as session:
+        counts = await seed_database(
+            session,
+            romancistas=args.romancistas,
+            livros=args.livros,
+            users=args.users,
+            password_hash=password_hash,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+
+    await engine.dispose()
+
+    return counts
+
+
+def seed(args):
+    start = perf_counter()
+    counts = asyncio.run(run_seed(args))
+    elapsed = perf_counter() - start
+    total = sum(counts.values())
+
+    print(
+        f'{counts["romancistas"]} romancistas, {counts["livros"]} livros e '
+        f'{counts["users"]} usuarios criados em {elapsed:.1f} s '
+        f'({total / elapsed:.0f} linhas/s)'
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='madr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    calibrate_parser = commands.add_parser(
+        'calibrate',
+        help='Mede o Argon2 nesta maquina e sugere os custos do hash',
+    )
+    calibrate_parser.add_argument('--target-ms', type=float, default=250)
+    calibrate_parser.add_argument(
+        '--parallelism', type=int, default=min(os.cpu_count() or 1, 4)
+    )
+    calibrate_parser.add_argument('--min-memory', type=int, default=19456)
+    calibrate_parser.add_argument('--max-memory', type=int, default=131072)
+    calibrate_parser.add_argument('--max-time-cost', type=int, default=10)
+    calibrate_parser.add_argument('--samples', type=int, default=5)
+    calibrate_parser.set_defaults(func=calibrate)
+
+    stats_parser = commands.add_parser(
+        'stats', help='Estatisticas do catalogo (livros por ano e romancista)'
+    )
+    stats_parser.add_argument('action', choices=['rebuild'])
+    stats_parser.set_defaults(func=stats)
+
+    seed_parser = commands.add_parser(
+        'seed', help='Gera romancistas, livros e usuarios sinteticos no banco'
+    )
+    seed_parser.add_argument('--romancistas', type=int, default=50000)
+    seed_parser.add_argument('--livros', type=int, default=1000000)
+    seed_parser.add_argument('--users', type=int, default=1000)
+    seed_parser.add_argument('--password', default='madr')
+    seed_parser.add_argument('--seed', type=int)
+    seed_parser.add_argument('--batch-size', type=int, default=100000)
+    seed_parser.set_defaults(func=seed)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,203 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from http import HTTPStatus
+from itertools import count
+from time import monotonic, perf_counter
+
+from fastapi import Request
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from madr.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+class MonitoredPool(AsyncAdaptedQueuePool):
+    # Conta os checkouts e, à parte, os que esperaram por uma conexão livre
+    # (pool e overflow esgotados), para que /admin/pool mostre a fila antes
+    # de virar erro de `QueuePool limit`.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        self.checkouts += 1
+
+        if not (
+            self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        ):
+            return super()._do_get()
+
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            self.waits += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+
+class ReplicaSet:
+    # Revezamento entre as réplicas; uma réplica que falhou ao conectar
+    # fica de fora por `retry` segundos antes de ser tentada de novo.
+    def __init__(self, engines, retry: float):
+        self.engines = list(engines)
+        self.retry = retry
+        self.down_until = [0.0] * len(self.engines)
+        self._turn = count()
+
+    def candidates(self):
+        if not self.engines:
+            return []
+
+        start = next(self._turn) % len(self.engines)
+        now = monotonic()
+
+        return [
+            index
+            for index in (
+                (start + offset) % len(self.engines)
+                for offset in range(len(self.engines))
+            )
+            if self.down_until[index] <= now
+        ]
+
+    def mark_down(self, index: int):
+        self.down_until[index] = monotonic() + self.retry
+
+
+settings = Settings()
+
+
+def build_engine(url: str, **kwargs):
+    return create_async_engine(
+        url,
+        **kwargs,
+        poolclass=MonitoredPool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    )
+
+
+engine = build_engine(settings.DATABASE_URL)
+replicas = ReplicaSet(
+    # Sem connect_timeout uma réplica que não responde prende a requisição
+    # até o timeout do sistema, em vez de cair para a próxima.
+    [
+        build_engine(
+            url,
+            connect_args={
+                'connect_timeout': settings.DATABASE_REPLICA_CONNECT_TIMEOUT
+            },
+        )
+        for url in settings.DATABASE_REPLICA_URLS
+    ],
+    retry=settings.DATABASE_REPLICA_RETRY,
+)
+PRIMARY_COOKIE = 'madr_primary'
+
 
+def pool_status(pool: MonitoredPool):
+    waits = pool.waits
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': pool._max_overflow,
+        'timeout': pool.timeout(),
+        'checkouts': pool.checkouts,
+        'waits': waits,
+        'wait_avg_ms': pool.wait_total / waits * 1000 if waits else 0.0,
+        'wait_max_ms': pool.wait_max * 1000,
+        'timeouts': pool.timeouts,
+    }
 
-def get_session():  # pragma: no cover
-    with Session(engine) as session:
+
+async def get_session():  # pragma: no cover
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def open_read_session(request: Request):
+    # Logo depois de uma escrita o cliente lê do primário (read-your-writes),
+    # já que a réplica pode ainda não ter recebido a alteração.
+    if not request.cookies.get(PRIMARY_COOKIE):
+        for index in replicas.candidates():
+            session = AsyncSession(
+                replicas.engines[index], expire_on_commit=False
+            )
+
+            try:
+                await session.connection()
+            except (DBAPIError, PoolTimeoutError):
+                await session.close()
+                replicas.mark_down(index)
+                continue
+
+            session.info['replica'] = True
+            return session
+
+    return AsyncSession(engine, expire_on_commit=False)
+
+
+async def get_read_session(request: Request):
+    async with await open_read_session(request) as session:
         yield session
+
+
+class LazyReadSession:
+    # Só escolhe e testa a réplica no primeiro uso: uma listagem servida
+    # pelo cache de respostas não pega conexão nenhuma.
+    def __init__(self, request: Request):
+        self.request = request
+        self.session = None
+
+    async def __call__(self):
+        if self.session is None:
+            self.session = await open_read_session(self.request)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+
+async def get_lazy_read_session(request: Request):
+    lazy = LazyReadSession(request)
+    try:
+        yield lazy
+    finally:
+        await lazy.close()
+
+
+async def stick_to_primary(request: Request, call_next):
+    response = await call_next(request)
+
+    if (
+        settings.DATABASE_REPLICA_URLS
+        and request.method not in {'GET', 'HEAD', 'OPTIONS'}
+        and response.status_code < HTTPStatus.BAD_REQUEST
+    ):
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            '1',
+            max_age=settings.DATABASE_READ_YOUR_WRITES,
+            httponly=True,
+            samesite='lax',
+        )
+
+    return response
@@ -0,0 +1,51 @@
+from hashlib import blake2b
+from http import HTTPStatus
+
+from fastapi import HTTPException, Request, Response
+
+from madr.settings import Settings
+
+settings = Settings()
+
+
+def entity_etag(kind: str, entity) -> str:
+    return f'"{kind}-{entity.id}.{entity.version_id}"'
+
+
+def list_etag(kind: str, entities, *extra) -> str:
+    # As versões das linhas mudam a cada UPDATE, então o hash dos pares
+    # (id, versão) identifica a página sem serializar o corpo.
+    digest = blake2b(kind.encode(), digest_size=16)
+    for entity in entities:
+        digest.update(f'|{entity.id}.{entity.version_id}'.encode())
+    digest.update(f'|{extra}'.encode())
+
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+
+    if header.strip() == '*':
+        return True
+
+    return etag in {
+        tag.strip().removeprefix('W/') for tag in header.split(',')
+    }
+
+
+def conditional_get(request: Request, response: Response, etag: str):
+    headers = {
+        'ETag': etag,
+        'Cache-Control': (
+            f'public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate'
+        ),
+    }
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_MODIFIED, headers=headers
+        )
+
+    response.headers.update(headers)
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+async def stream_partitions(bind, query: Select):
+    # O FastAPI fecha a sessão da requisição antes do corpo ser enviado, então
+    # o export abre a sua própria sessão no mesmo engine. Com yield_per o
+    # driver usa um cursor no servidor e só EXPORT_BATCH_SIZE linhas ficam em
+    # memória por vez.
+    async with AsyncSession(bind) as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.mappings().partitions():
+            yield partition
+
+
+async def encode_ndjson(partitions, nest):
+    async for partition in partitions:
+        yield ''.join(
+            json.dumps(nest(row), ensure_ascii=False) + '\n'
+            for row in partition
+        )
+
+
+async def encode_csv(partitions, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for partition in partitions:
+        writer.writerows(
+            [row[column] for column in columns] for row in partition
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def nest_romancista(row):
+    livro = {
+        key: value for key, value in row.items() if key != 'romancista_nome'
+    }
+    livro['romancista'] = {
+        'id': row['romancista_id'],
+        'nome': row['romancista_nome'],
+    }
+    return livro
+
+
+def export_response(
+    bind, query: Select, file_format: str, filename: str, nest=dict
+):
+    partitions = stream_partitions(bind, query)
+
+    if file_format == 'csv':
+        content = encode_csv(partitions, list(query.selected_columns.keys()))
+    else:
+        content = encode_ndjson(partitions, nest)
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[file_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{filename}.{file_format}"'
+            )
+        },
+    )
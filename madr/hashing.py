@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from time import perf_counter
+
+from fastapi import HTTPException
+
+from madr.metrics import hashing_duration
+from madr.security import (
+    get_password_hash,
+    verify_and_update_password,
+    verify_password,
+)
+from madr.settings import Settings
+
+
+class HashingPool:
+    # Argon2 roda em processos separados para não ocupar o event loop nem o
+    # threadpool da API. Quando todos os workers e a fila estão ocupados a
+    # requisição é recusada na hora com 503, sem esperar.
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # forkserver: o pool nasce (ou renasce) com a API já rodando,
+            # cheia de threads, e um fork dela pode travar o filho.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('forkserver'),
+            )
+        return self._executor
+
+    @staticmethod
+    def unavailable():
+        return HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Servico de autenticacao ocupado',
+            headers={'Retry-After': '1'},
+        )
+
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.max_pending:
+            raise self.unavailable()
+
+        self.pending += 1
+        start = perf_counter()
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # Um worker morto quebra o pool para sempre; descarta e o
+            # próximo run cria outro. Só se ninguém já o tiver trocado.
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False)
+            raise self.unavailable()
+        finally:
+            self.pending -= 1
+            hashing_duration.observe(perf_counter() - start, func.__name__)
+
+    async def hash(self, password: str):
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str):
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ):
+        return await self.run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=Settings().HASHING_WORKERS,
+    max_pending=Settings().HASHING_MAX_PENDING,
+)
@@ -0,0 +1,25 @@
+from sqlalchemy import ARRAY, Integer, any_, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def match_ids(column, ids: list[int], dialect: str):
+    if dialect == 'postgresql':
+        # Um único parâmetro array: o plano é o mesmo para qualquer N
+        return column == any_(bindparam('ids', ids, type_=ARRAY(Integer)))
+
+    return column.in_(ids)
+
+
+async def lookup(session: AsyncSession, model, ids: list[int]):
+    ids = list(dict.fromkeys(ids))
+    rows = await session.scalars(
+        select(model).where(
+            match_ids(model.id, ids, session.bind.dialect.name)
+        )
+    )
+    found = {row.id: row for row in rows}
+
+    return (
+        [found[key] for key in ids if key in found],
+        [key for key in ids if key not in found],
+    )
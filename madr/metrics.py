@@ -0,0 +1,202 @@
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+
+from fastapi import Request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value))
+
+
+def format_labels(labels) -> str:
+    if not labels:
+        return ''
+
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in labels
+    )
+
+    return f'{{{pairs}}}'
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = defaultdict(float)
+
+    def key(self, labels):
+        return tuple(zip(self.labels, labels))
+
+    def set(self, value: float, *labels):
+        self.values[self.key(labels)] = value
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, key, value
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines += [
+            f'{name}{format_labels(labels)} {format_value(value)}'
+            for name, labels, value in self.samples()
+        ]
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[self.key(labels)] += amount
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels, amount: float = 1):
+        self.values[self.key(labels)] -= amount
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self.counts = {}
+
+    def observe(self, value: float, *labels):
+        key = self.key(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.values[key] += value
+
+    def samples(self):
+        for key in sorted(self.counts):
+            total = 0
+            bounds = (*self.buckets, float('inf'))
+            for bound, count in zip(bounds, self.counts[key]):
+                total += count
+                le = ('le', format_value(bound))
+                yield f'{self.name}_bucket', (*key, le), total
+
+            yield f'{self.name}_sum', key, self.values[key]
+            yield f'{self.name}_count', key, total
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = [line for metric in self.metrics for line in metric.render()]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter(
+        'madr_http_requests_total',
+        'Requisicoes HTTP por rota e status',
+        ('method', 'route', 'status'),
+    )
+)
+http_duration = registry.register(
+    Histogram(
+        'madr_http_request_duration_seconds',
+        'Latencia das requisicoes HTTP por rota',
+        ('method', 'route'),
+    )
+)
+http_in_progress = registry.register(
+    Gauge('madr_http_requests_in_progress', 'Requisicoes HTTP em andamento')
+)
+threadpool_threads = registry.register(
+    Gauge(
+        'madr_threadpool_threads',
+        'Threads do threadpool do anyio (ocupadas e limite)',
+        ('state',),
+    )
+)
+db_pool_connections = registry.register(
+    Gauge(
+        'madr_db_pool_connections',
+        'Conexoes do pool do SQLAlchemy por estado',
+        ('state',),
+    )
+)
+db_pool_checkouts = registry.register(
+    Counter('madr_db_pool_checkouts_total', 'Checkouts de conexao do pool')
+)
+db_pool_wait = registry.register(
+    Counter(
+        'madr_db_pool_checkout_wait_seconds_total',
+        'Tempo total esperando por uma conexao do pool',
+    )
+)
+db_pool_timeouts = registry.register(
+    Counter(
+        'madr_db_pool_timeouts_total',
+        'Checkouts que estouraram DATABASE_POOL_TIMEOUT',
+    )
+)
+hashing_duration = registry.register(
+    Histogram(
+        'madr_password_hashing_seconds',
+        'Tempo do Argon2 por operacao, incluindo a fila do pool de processos',
+        ('operation',),
+    )
+)
+hashing_pending = registry.register(
+    Gauge(
+        'madr_password_hashing_pending',
+        'Operacoes de hash em execucao ou na fila',
+    )
+)
+
+
+async def track_requests(request: Request, call_next):
+    http_in_progress.inc()
+    start = perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+
+    finally:
+        http_in_progress.dec()
+        # O template da rota ('/livro/{livro_id}'), não o caminho, para não
+        # criar uma série por id.
+        route = request.scope.get('route')
+        path = route.path if route else 'unmatched'
+        http_duration.observe(perf_counter() - start, request.method, path)
+        http_requests.inc(request.method, path, status)
@@ -1,8 +1,16 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import DDL, ForeignKey, Index, event, text
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
+event.listen(
+    table_registry.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'
+    ),
+)
+
 
 @table_registry.mapped_as_dataclass
 class User:
@@ -16,20 +24,67 @@ class User:
 @table_registry.mapped_as_dataclass
 class Livro:
     __tablename__ = 'livros'
+    __table_args__ = (
+        Index(
+            'ix_livros_titulo_trgm',
+            'titulo',
+            postgresql_using='gin',
+            postgresql_ops={'titulo': 'gin_trgm_ops'},
+        ),
+        Index('ix_livros_ano_id', 'ano', 'id'),
+    )
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     ano: Mapped[int]
     titulo: Mapped[str] = mapped_column(unique=True)
-    romancista_id: Mapped[int] = mapped_column(ForeignKey('romancista.id'))
+    romancista_id: Mapped[int] = mapped_column(
+        ForeignKey('romancista.id', ondelete='CASCADE'), index=True
+    )
     romancista: Mapped['Romancista'] = relationship(
         init=False, back_populates='livros'
     )
+    version_id: Mapped[int] = mapped_column(
+        init=False, server_default=text('1')
+    )
+    __mapper_args__ = {'version_id_col': version_id}
 
 
 @table_registry.mapped_as_dataclass
 class Romancista:
     __tablename__ = 'romancista'
+    __table_args__ = (
+        Index(
+            'ix_romancista_nome_trgm',
+            'nome',
+            postgresql_using='gin',
+            postgresql_ops={'nome': 'gin_trgm_ops'},
+        ),
+    )
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     nome: Mapped[str] = mapped_column(unique=True)
     livros: Mapped[list['Livro']] = relationship(
-        init=False, back_populates='romancista', cascade='all, delete-orphan'
+        init=False,
+        back_populates='romancista',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        order_by='Livro.id',
+    )
+    version_id: Mapped[int] = mapped_column(
+        init=False, server_default=text('1')
+    )
+    __mapper_args__ = {'version_id_col': version_id}
+
+
+@table_registry.mapped_as_dataclass
+class LivrosPorAno:
+    __tablename__ = 'livros_por_ano'
+    ano: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    total: Mapped[int]
+
+
+@table_registry.mapped_as_dataclass
+class LivrosPorRomancista:
+    __tablename__ = 'livros_por_romancista'
+    romancista_id: Mapped[int] = mapped_column(
+        ForeignKey('romancista.id', ondelete='CASCADE'), primary_key=True
     )
+    total: Mapped[int]
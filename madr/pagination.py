@@ -0,0 +1,123 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.schemas import FilterPage
+from madr.settings import Settings
+
+settings = Settings()
+
+
+def encode_cursor(order_by: str, values: list):
+    payload = json.dumps({'o': order_by, 'v': values}, separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, order_by: str, columns):
+    invalid_cursor = HTTPException(
+        status_code=HTTPStatus.BAD_REQUEST, detail='Cursor invalido'
+    )
+
+    try:
+        payload = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (Base64Error, ValueError):
+        raise invalid_cursor
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get('o') != order_by
+        or not isinstance(payload.get('v'), list)
+        or len(payload['v']) != len(columns)
+    ):
+        raise invalid_cursor
+
+    # O cursor vem do cliente: cada valor precisa ter o tipo da sua coluna,
+    # senão o banco recusa a comparação e a requisição vira um 500.
+    for value, column in zip(payload['v'], columns):
+        expected = column.type.python_type
+        if type(value) is not expected:
+            raise invalid_cursor
+
+    return payload['v']
+
+
+def sort_columns(model, order_by: str):
+    if order_by == 'id':
+        return (model.id,)
+
+    return (getattr(model, order_by), model.id)
+
+
+def paginate(query: Select, model, page: FilterPage):
+    # Ordena sempre por uma chave única (a coluna escolhida + id) para que as
+    # páginas sejam estáveis; com cursor a página seguinte vira um WHERE
+    # sobre essa chave e custa o mesmo que a primeira.
+    columns = sort_columns(model, page.order_by)
+    query = query.order_by(*columns)
+
+    if page.cursor:
+        values = decode_cursor(page.cursor, page.order_by, columns)
+        query = query.where(tuple_(*columns) > tuple_(*values))
+
+    return query.offset(page.offset).limit(page.limit)
+
+
+def next_cursor(rows, page: FilterPage):
+    if not rows or page.limit is None or len(rows) < page.limit:
+        return None
+
+    last = rows[-1]
+    values = [
+        getattr(last, column.key)
+        for column in sort_columns(type(last), page.order_by)
+    ]
+
+    return encode_cursor(page.order_by, values)
+
+
+async def estimate_rows(session: AsyncSession, query: Select, model):
+    if query.whereclause is None:
+        # Sem filtro basta a estatística da tabela, sem planejar nada
+        return await session.scalar(
+            text(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = CAST(:table AS regclass)'
+            ),
+            {'table': model.__tablename__},
+        )
+
+    connection = await session.connection()
+    compiled = query.compile(dialect=connection.dialect)
+    result = await connection.exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    )
+
+    return result.scalar()[0]['Plan']['Plan Rows']
+
+
+async def count_total(session: AsyncSession, query: Select, model):
+    # COUNT(*) limitado ao limiar: o custo nunca passa de
+    # EXACT_COUNT_THRESHOLD linhas, e acima disso o total é estimado.
+    threshold = settings.EXACT_COUNT_THRESHOLD
+    bounded = query.with_only_columns(model.id).limit(threshold + 1)
+    count = await session.scalar(
+        select(func.count()).select_from(bounded.subquery())
+    )
+
+    if count <= threshold or session.bind.dialect.name != 'postgresql':
+        if count > threshold:
+            count = await session.scalar(
+                select(func.count()).select_from(
+                    query.with_only_columns(model.id).subquery()
+                )
+            )
+        return {'value': count, 'kind': 'exact'}
+
+    estimate = await estimate_rows(session, query, model)
+
+    return {'value': max(int(estimate), count), 'kind': 'estimated'}
@@ -0,0 +1,114 @@
+import logging
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from madr.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger('madr.sql')
+
+
+class RequestProfile:
+    def __init__(self, request: Request):
+        self.request = request
+        self.timings = defaultdict(float)
+        self.queries = 0
+        self.statements = Counter()
+
+    @property
+    def route(self) -> str:
+        route = self.request.scope.get('route')
+        path = route.path if route else self.request.url.path
+
+        return f'{self.request.method} {path}'
+
+    def record_query(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.timings['db'] += elapsed
+        self.statements[statement] += 1
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning(
+                'Consulta lenta (%.1f ms) em %s: %s',
+                elapsed * 1000,
+                self.route,
+                statement,
+            )
+
+        # Avisa uma vez por formato, quando atinge o limite: o mesmo SQL
+        # com parâmetros diferentes em loop é o sinal de N+1.
+        if self.statements[statement] == settings.N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                'Possivel N+1 em %s: a mesma consulta rodou %d vezes: %s',
+                self.route,
+                settings.N_PLUS_ONE_THRESHOLD,
+                statement,
+            )
+
+    def server_timing(self, total: float) -> str:
+        phases = [
+            f'db;dur={self.timings["db"] * 1000:.1f};'
+            f'desc="{self.queries} queries"'
+        ]
+        phases += [
+            f'{phase};dur={self.timings[phase] * 1000:.1f}'
+            for phase in ('auth', 'serialize')
+        ]
+        phases.append(f'total;dur={total * 1000:.1f}')
+
+        return ', '.join(phases)
+
+
+request_profile: ContextVar[RequestProfile | None] = ContextVar(
+    'request_profile', default=None
+)
+
+
+@contextmanager
+def timed(phase: str):
+    profile = request_profile.get()
+    start = perf_counter()
+
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.timings[phase] += perf_counter() - start
+
+
+# Escuta a classe Engine, e não o engine da aplicação, para cobrir também
+# engines criados fora de madr.database (como o dos testes).
+@event.listens_for(Engine, 'before_cursor_execute', named=True)
+def start_query(context, **kwargs):
+    context.profile_start = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute', named=True)
+def end_query(context, statement, **kwargs):
+    profile = request_profile.get()
+
+    if profile is not None:
+        profile.record_query(statement, perf_counter() - context.profile_start)
+
+
+async def profile_requests(request: Request, call_next):
+    profile = RequestProfile(request)
+    token = request_profile.set(profile)
+    start = perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        request_profile.reset(token)
+
+    response.headers['Server-Timing'] = profile.server_timing(
+        perf_counter() - start
+    )
+
+    return response
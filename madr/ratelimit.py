@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from http import HTTPStatus
+from math import ceil
+from time import monotonic, time
+
+from fastapi import HTTPException, Request
+
+from madr.metrics import Counter, registry
+from madr.settings import Settings
+
+settings = Settings()
+
+rate_limited = registry.register(
+    Counter(
+        'madr_rate_limited_total',
+        'Requisicoes recusadas pelo limite de taxa',
+        ('scope',),
+    )
+)
+
+
+class MemoryBuckets:
+    # Um float por chave (o instante em que o balde volta a encher) num
+    # OrderedDict em ordem de uso: o mais antigo sai primeiro ao passar de
+    # maxsize, e chaves com o balde já cheio não guardam estado nenhum.
+    clock = staticmethod(monotonic)
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value: float, ttl: float):
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        now = self.clock()
+        while self._data and (
+            len(self._data) > self.maxsize
+            or next(iter(self._data.values())) <= now
+        ):
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+class SharedBuckets:
+    # Mesmo subconjunto do redis-py do SharedBackend do cache (get e set
+    # com ex), com relógio de parede para valer entre instâncias. O get e o
+    # set não são atômicos: em corridas entre instâncias o limite pode
+    # passar por poucas requisições, o que basta para proteger a CPU.
+    clock = staticmethod(time)
+
+    def __init__(self, client, prefix: str = 'madr:rl:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(f'{self.prefix}{key}')
+        return None if value is None else float(value)
+
+    def set(self, key, value: float, ttl: float):
+        self.client.set(f'{self.prefix}{key}', repr(value), ex=ceil(ttl))
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class RateLimiter:
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def hit(self, key: str, capacity: int, period: float) -> float:
+        # Token bucket na forma GCRA: `capacity` requisições de uma vez e
+        # uma ficha de volta a cada period / capacity segundos. Retorna 0
+        # se a requisição passa ou quantos segundos esperar.
+        interval = period / capacity
+        now = self.buckets.clock()
+        full_at = max(self.buckets.get(key) or now, now)
+
+        if full_at - now > period - interval:
+            return full_at - now - (period - interval)
+
+        self.buckets.set(key, full_at + interval, full_at + interval - now)
+        return 0
+
+    def clear(self):
+        self.buckets.clear()
+
+
+rate_limiter = RateLimiter(MemoryBuckets(maxsize=settings.RATE_LIMIT_SIZE))
+
+
+def enforce(scope: str, key: str, capacity: int):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    retry_after = rate_limiter.hit(
+        f'{scope}:{key}', capacity, settings.RATE_LIMIT_PERIOD
+    )
+
+    if retry_after:
+        rate_limited.inc(scope)
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Muitas tentativas, tente novamente mais tarde',
+            headers={'Retry-After': str(ceil(retry_after))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    # Atrás do proxy do Fly o request.client é o proxy; o Fly-Client-IP é
+    # sobrescrito por ele a cada requisição, ao contrário do
+    # X-Forwarded-For, que o cliente pode preencher.
+    header = settings.RATE_LIMIT_CLIENT_IP_HEADER
+    if header and (forwarded := request.headers.get(header)):
+        return forwarded.strip()
+
+    return request.client.host if request.client else 'desconhecido'
+
+
+async def limit_ip(request: Request):
+    enforce('ip', client_ip(request), settings.RATE_LIMIT_IP_REQUESTS)
+
+
+def limit_account(account: str):
+    enforce('account', account.lower(), settings.RATE_LIMIT_ACCOUNT_REQUESTS)
@@ -0,0 +1,54 @@
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.cache import MemoryBackend, ResponseCache
+from madr.database import PRIMARY_COOKIE
+from madr.settings import Settings
+
+settings = Settings()
+
+response_cache = ResponseCache(
+    MemoryBackend(
+        maxsize=Settings().RESPONSE_CACHE_SIZE,
+        ttl=Settings().RESPONSE_CACHE_TTL,
+    )
+)
+
+
+def cached_page(request: Request, key: str):
+    # Cliente preso ao primário depois de uma escrita: a entrada pode ter
+    # vindo de uma réplica atrasada, então lê direto do banco.
+    if request.cookies.get(PRIMARY_COOKIE):
+        return None
+
+    return response_cache.get(key)
+
+
+def cache_page(session: AsyncSession, key: str, page: dict):
+    if not session.info.get('replica'):
+        response_cache.set(key, page)
+        return
+
+    # Página lida de réplica pode ser anterior à última invalidação; fica
+    # pouco tempo, para não servir dados velhos sob a geração nova.
+    if settings.RESPONSE_CACHE_REPLICA_TTL > 0:
+        response_cache.set(key, page, settings.RESPONSE_CACHE_REPLICA_TTL)
+
+
+def livro_tags(ano: int | None):
+    # 'livros' invalida tudo; as demais separam as listagens por ano
+    return ('livros', f'livros:ano:{ano}' if ano else 'livros:all')
+
+
+def invalidate_livros(*anos):
+    if not anos:
+        response_cache.invalidate('livros')
+        return
+
+    response_cache.invalidate(
+        'livros:all', *(f'livros:ano:{ano}' for ano in set(anos))
+    )
+
+
+def invalidate_romancistas():
+    response_cache.invalidate('romancistas')
@@ -0,0 +1,24 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from madr.database import engine, pool_status
+from madr.models import User
+from madr.schemas import CacheStatus, PoolStatus
+from madr.security import get_current_user, principal_cache
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+T_CurrentUser = Annotated[User, Depends(get_current_user)]
+
+
+@router.get('/pool', status_code=HTTPStatus.OK, response_model=PoolStatus)
+async def get_pool_status(user: T_CurrentUser):
+    return pool_status(engine.pool)
+
+
+@router.get(
+    '/cache/principals', status_code=HTTPStatus.OK, response_model=CacheStatus
+)
+async def get_principal_cache_status(user: T_CurrentUser):
+    return principal_cache.status()
@@ -4,32 +4,52 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from madr.database import get_session
+from madr.hashing import hashing_pool
 from madr.models import User
+from madr.ratelimit import limit_account, limit_ip
 from madr.schemas import Token
 from madr.security import (
     create_access_token,
     get_current_user,
-    verify_password,
+    principal_cache,
 )
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
-@router.post('/token', response_model=Token)
-def login_for_access_token(session: T_Session, form_data: T_OAuth2Form):
-    user = session.scalar(select(User).where(User.email == form_data.username))
+@router.post('/token', response_model=Token, dependencies=[Depends(limit_ip)])
+async def login_for_access_token(session: T_Session, form_data: T_OAuth2Form):
+    limit_account(form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password):
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Incorrect email or password',
-        )
+    incorrect_credentials = HTTPException(
+        status_code=HTTPStatus.BAD_REQUEST,
+        detail='Incorrect email or password',
+    )
+
+    user = await session.scalar(
+        select(User).where(User.email == form_data.username)
+    )
+
+    if not user:
+        raise incorrect_credentials
+
+    verified, updated_hash = await hashing_pool.verify_and_update(
+        form_data.password, user.password
+    )
+
+    if not verified:
+        raise incorrect_credentials
+
+    if updated_hash:
+        user.password = updated_hash
+        await session.commit()
+        principal_cache.pop(user.email)
 
     access_token = create_access_token(data={'sub': user.email})
 
@@ -37,6 +57,6 @@ def login_for_access_token(session: T_Session, form_data: T_OAuth2Form):
 
 
 @router.post('/refresh_token', response_model=Token)
-def refresh_token(user: User = Depends(get_current_user)):
+async def refresh_token(user: User = Depends(get_current_user)):
     new_access_token = create_access_token(data={'sub': user.email})
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
@@ -1,64 +1,232 @@
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+)
 from slugify import slugify
-from sqlalchemy import select
+from sqlalchemy import delete, exists, insert, literal, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from madr.database import get_session
-from madr.models import Livro, User
+from madr.bulk import (
+    BATCH_SIZE,
+    create_livros,
+    import_livros,
+    patch_livros,
+    read_rows,
+)
+from madr.database import (
+    LazyReadSession,
+    get_lazy_read_session,
+    get_read_session,
+    get_session,
+)
+from madr.etag import conditional_get, entity_etag, list_etag
+from madr.export import export_response, nest_romancista
+from madr.lookup import lookup
+from madr.models import Livro, Romancista, User
+from madr.pagination import count_total, next_cursor, paginate
+from madr.profiling import timed
+from madr.response_cache import (
+    cache_page,
+    cached_page,
+    invalidate_livros,
+    invalidate_romancistas,
+    livro_tags,
+    response_cache,
+)
 from madr.schemas import (
+    FilterLivro,
+    ImportReport,
+    LivroBatchReport,
+    LivroBatchUpdate,
+    LivroImport,
     LivroList,
+    LivroListExpanded,
+    LivroLookup,
     LivroPublic,
     LivroSchema,
     LivroUpdate,
+    LivroWithRomancista,
+    LookupIds,
     Message,
 )
+from madr.search import similarity_search
 from madr.security import get_current_user
+from madr.serialization import render
+from madr.stats import move_livros, track_livros
 
 router = APIRouter(prefix='/livro', tags=['livro'])
+
+
+# Com Depends(FilterLivro) o FastAPI montaria o modelo, um callable
+# síncrono, no threadpool a cada listagem; os parâmetros já chegam
+# validados.
+async def filter_livro(  # noqa: PLR0913, PLR0917
+    offset: int | None = None,
+    limit: int | None = 20,
+    cursor: str | None = None,
+    order_by: Literal['id', 'ano', 'titulo'] = 'id',
+    with_total: bool = False,
+    ano: int | None = None,
+    titulo: str | None = None,
+    romancista_id: int | None = None,
+    expand: Literal['romancista'] | None = None,
+):
+    return FilterLivro(
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+        order_by=order_by,
+        with_total=with_total,
+        ano=ano,
+        titulo=titulo,
+        romancista_id=romancista_id,
+        expand=expand,
+    )
+
+
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_LazyReadSession = Annotated[LazyReadSession, Depends(get_lazy_read_session)]
+T_FilterLivro = Annotated[FilterLivro, Depends(filter_livro)]
+T_LivroBatch = Annotated[list[LivroSchema], Body(max_length=BATCH_SIZE)]
+T_LivroBatchUpdate = Annotated[
+    list[LivroBatchUpdate], Body(max_length=BATCH_SIZE)
+]
 
 
 @router.post('/', status_code=HTTPStatus.OK, response_model=LivroPublic)
-def create_livro(livro: LivroSchema, session: T_Session, user: T_CurrentUser):
-    db_livro = session.scalar(
-        select(Livro).where(Livro.titulo == livro.titulo)
-    )
-    if db_livro:
+async def create_livro(
+    livro: LivroSchema, session: T_Session, user: T_CurrentUser
+):
+    titulo = slugify(livro.titulo, separator=' ')
+
+    # A checagem do titulo vai no proprio INSERT e o RETURNING devolve a
+    # linha criada: uma ida ao banco em vez de SELECT, INSERT e refresh.
+    try:
+        db_livro = await session.scalar(
+            insert(Livro)
+            .from_select(
+                ['ano', 'titulo', 'romancista_id'],
+                select(
+                    literal(livro.ano),
+                    literal(titulo),
+                    literal(livro.romancista_id),
+                ).where(
+                    ~exists().where(Livro.titulo.in_([titulo, livro.titulo]))
+                ),
+            )
+            .returning(Livro)
+        )
+        if db_livro:
+            await track_livros(
+                session, [(db_livro.ano, db_livro.romancista_id)]
+            )
+        await session.commit()
+
+    except IntegrityError:
+        # Titulo gravado por outra requisição no meio tempo ou romancista
+        # inexistente (FK); só o segundo caso vira 404.
+        await session.rollback()
+        db_livro = None
+
+        if not await session.get(Romancista, livro.romancista_id):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail='Romancista nao consta no MADR',
+            )
+
+    if not db_livro:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT, detail='Livro ja consta no MADR'
         )
 
-    db_livro = Livro(
-        ano=livro.ano,
-        titulo=slugify(livro.titulo, separator=' '),
-        romancista_id=livro.romancista_id,
-    )
+    invalidate_livros(db_livro.ano)
+
+    return render(LivroPublic, db_livro)
 
-    session.add(db_livro)
-    session.commit()
-    session.refresh(db_livro)
 
-    return db_livro
+@router.post('/import', status_code=HTTPStatus.OK, response_model=ImportReport)
+async def import_livro(
+    request: Request, session: T_Session, user: T_CurrentUser
+):
+    try:
+        return await import_livros(session, read_rows(request, LivroImport))
+    finally:
+        invalidate_livros()
+        invalidate_romancistas()
+
+
+@router.post(
+    '/batch', status_code=HTTPStatus.OK, response_model=LivroBatchReport
+)
+async def create_livro_batch(
+    livros: T_LivroBatch, session: T_Session, user: T_CurrentUser
+):
+    try:
+        return await create_livros(session, livros)
+
+    except IntegrityError:
+        # Romancista removido por outra requisição depois da checagem
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Romancista nao consta mais no MADR',
+        )
+
+    finally:
+        invalidate_livros()
+
+
+@router.patch(
+    '/batch', status_code=HTTPStatus.OK, response_model=LivroBatchReport
+)
+async def patch_livro_batch(
+    livros: T_LivroBatchUpdate, session: T_Session, user: T_CurrentUser
+):
+    try:
+        return await patch_livros(session, livros)
+
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Este titulo ja consta no MADR',
+        )
+
+    finally:
+        invalidate_livros()
 
 
 @router.delete(
     '/{livro_id}', status_code=HTTPStatus.OK, response_model=Message
 )
-def delete_livro(livro_id: int, session: T_Session, user: T_CurrentUser):
-    db_livro = session.scalar(select(Livro).where(Livro.id == livro_id))
+async def delete_livro(livro_id: int, session: T_Session, user: T_CurrentUser):
+    db_livro = (
+        await session.execute(
+            delete(Livro)
+            .where(Livro.id == livro_id)
+            .returning(Livro.ano, Livro.romancista_id)
+        )
+    ).first()
 
-    if not db_livro:
+    if db_livro is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
         )
 
-    session.delete(db_livro)
-    session.commit()
+    await track_livros(session, [db_livro], sign=-1)
+    await session.commit()
+    invalidate_livros(db_livro.ano)
 
     return {'message': 'Livro deletado no MADR'}
 
@@ -66,64 +234,202 @@ def delete_livro(livro_id: int, session: T_Session, user: T_CurrentUser):
 @router.patch(
     '/{livro_id}', status_code=HTTPStatus.OK, response_model=LivroPublic
 )
-def patch_livro(
+async def patch_livro(
     livro_id: int, session: T_Session, user: T_CurrentUser, livro: LivroUpdate
 ):
-    db_livro = session.scalar(select(Livro).where(Livro.id == livro_id))
+    changes = livro.model_dump(exclude_none=True)
 
-    if not db_livro:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
+    if 'titulo' in changes:
+        changes['titulo'] = slugify(changes['titulo'], separator=' ')
+
+    old_ano = None
+    if 'ano' in changes:
+        # O RETURNING só traz o ano novo: o antigo (para as estatísticas e o
+        # cache) é lido antes, com a linha travada até o commit.
+        old_ano = await session.scalar(
+            select(Livro.ano).where(Livro.id == livro_id).with_for_update()
         )
 
     try:
-        for key, value in livro.model_dump(exclude_unset=True).items():
-            setattr(db_livro, key, value)
-
-        db_livro.titulo = slugify(db_livro.titulo, separator=' ')
-        session.add(db_livro)
-        session.commit()
-        session.refresh(db_livro)
+        db_livro = await session.scalar(
+            update(Livro)
+            .where(Livro.id == livro_id)
+            .values(**changes, version_id=Livro.version_id + 1)
+            .returning(Livro)
+        )
+        if db_livro and old_ano is not None:
+            await move_livros(session, [(old_ano, db_livro.ano)])
+        await session.commit()
 
     except IntegrityError:
+        await session.rollback()
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Este titulo ja consta no MADR',
         )
 
-    return db_livro
+    if not db_livro:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
+        )
+
+    invalidate_livros(
+        db_livro.ano if old_ano is None else old_ano, db_livro.ano
+    )
+
+    return render(LivroPublic, db_livro)
+
+
+@router.post('/lookup', status_code=HTTPStatus.OK, response_model=LivroLookup)
+async def lookup_livro(lookup_ids: LookupIds, session: T_Session):
+    livros, missing = await lookup(session, Livro, lookup_ids.ids)
+
+    return render(LivroLookup, {'livros': livros, 'missing': missing})
+
+
+@router.get('/search', status_code=HTTPStatus.OK, response_model=LivroList)
+async def search_livro(session: T_ReadSession, q: str, limit: int = 20):
+    term = slugify(q, separator=' ')
+
+    if not term:
+        return render(LivroList, {'livros': []})
+
+    livros = await session.scalars(
+        similarity_search(Livro.titulo, term, session.bind.dialect.name, limit)
+    )
+
+    return render(LivroList, {'livros': livros.all()})
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_livro(
+    session: T_ReadSession,
+    format: Literal['ndjson', 'csv'] = 'ndjson',
+    expand: Literal['romancista'] | None = None,
+):
+    query = select(
+        Livro.id, Livro.ano, Livro.titulo, Livro.romancista_id
+    ).order_by(Livro.id)
+    nest = dict
+
+    if expand:
+        query = query.join(Romancista).add_columns(
+            Romancista.nome.label('romancista_nome')
+        )
+        nest = nest_romancista
+
+    return export_response(session.bind, query, format, 'livros', nest)
 
 
 @router.get(
-    '/{livro_id}', status_code=HTTPStatus.OK, response_model=LivroPublic
+    '/{livro_id}',
+    status_code=HTTPStatus.OK,
+    response_model=LivroWithRomancista | LivroPublic,
 )
-def get_livro_by_id(livro_id: int, session: T_Session):
-    db_livro = session.scalar(select(Livro).where(Livro.id == livro_id))
+async def get_livro_by_id(
+    livro_id: int,
+    session: T_ReadSession,
+    request: Request,
+    response: Response,
+    expand: Literal['romancista'] | None = None,
+):
+    query = select(Livro).where(Livro.id == livro_id)
+
+    if expand:
+        query = query.options(joinedload(Livro.romancista))
+
+    db_livro = await session.scalar(query)
 
     if not db_livro:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Livro nao consta no MADR'
         )
 
-    return db_livro
+    if expand:
+        model = LivroWithRomancista
+        etag = list_etag('livro', [db_livro, db_livro.romancista])
+    else:
+        model = LivroPublic
+        etag = entity_etag('livro', db_livro)
 
+    conditional_get(request, response, etag)
 
-@router.get('/', status_code=HTTPStatus.OK, response_model=LivroList)
-def list_livro(
-    session: T_Session,
-    ano: int | None = None,
-    titulo: str | None = None,
-    offset: int | None = None,
-    limit: int | None = 20,
+    return render(model, db_livro, response, narrow=True)
+
+
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=LivroListExpanded | LivroList,
+)
+async def list_livro(
+    read_session: T_LazyReadSession,
+    livro_filter: T_FilterLivro,
+    request: Request,
+    response: Response,
 ):
-    query = select(Livro)
+    tags = livro_tags(livro_filter.ano)
+    model = LivroList
+
+    if livro_filter.expand:
+        # Os nomes dos romancistas também vão na resposta
+        tags += ('romancistas',)
+        model = LivroListExpanded
+
+    key = response_cache.key(
+        'livros', tags, livro_filter.model_dump(exclude_none=True)
+    )
+    cached = cached_page(request, key)
 
-    if ano:
-        query = query.where(Livro.ano == ano)
+    if cached is None:
+        session = await read_session()
+        query = select(Livro)
 
-    if titulo:
-        query = query.filter(Livro.titulo.contains(titulo))
+        if livro_filter.ano:
+            query = query.where(Livro.ano == livro_filter.ano)
+
+        if livro_filter.titulo:
+            query = query.filter(Livro.titulo.contains(livro_filter.titulo))
+
+        if livro_filter.romancista_id:
+            query = query.where(
+                Livro.romancista_id == livro_filter.romancista_id
+            )
+
+        page_query = paginate(query, Livro, livro_filter)
+
+        if livro_filter.expand:
+            page_query = page_query.options(joinedload(Livro.romancista))
+
+        list_livros = await session.scalars(page_query)
+        livros = list_livros.all()
+        cursor = next_cursor(livros, livro_filter)
+        total = (
+            await count_total(session, query, Livro)
+            if livro_filter.with_total
+            else None
+        )
+        with timed('serialize'):
+            body = model.model_validate(
+                {'livros': livros, 'next_cursor': cursor, 'total': total},
+                from_attributes=True,
+            )
+            romancistas = (
+                [
+                    (livro.romancista.id, livro.romancista.version_id)
+                    for livro in livros
+                ]
+                if livro_filter.expand
+                else None
+            )
+            cached = {
+                'etag': list_etag(
+                    'livros', livros, cursor, total, romancistas
+                ),
+                'body': body.model_dump(mode='json'),
+            }
+        cache_page(session, key, cached)
 
-    list_livros = session.scalars(query.offset(offset).limit(limit)).all()
+    conditional_get(request, response, cached['etag'])
 
-    return {'livros': list_livros}
+    return render(model, cached['body'], response)
@@ -0,0 +1,42 @@
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from madr.database import engine
+from madr.hashing import hashing_pool
+from madr.metrics import (
+    db_pool_checkouts,
+    db_pool_connections,
+    db_pool_timeouts,
+    db_pool_wait,
+    hashing_pending,
+    registry,
+    threadpool_threads,
+)
+
+router = APIRouter(tags=['metrics'])
+
+
+def collect_runtime():
+    limiter = current_default_thread_limiter()
+    threadpool_threads.set(limiter.borrowed_tokens, 'busy')
+    threadpool_threads.set(limiter.total_tokens, 'max')
+
+    pool = engine.pool
+    db_pool_connections.set(pool.checkedout(), 'checked_out')
+    db_pool_connections.set(pool.checkedin(), 'idle')
+    db_pool_connections.set(max(pool.overflow(), 0), 'overflow')
+    db_pool_checkouts.set(pool.checkouts)
+    db_pool_wait.set(pool.wait_total)
+    db_pool_timeouts.set(pool.timeouts)
+
+    hashing_pending.set(hashing_pool.pending)
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    collect_runtime()
+
+    return PlainTextResponse(
+        registry.render(), media_type='text/plain; version=0.0.4'
+    )
@@ -1,25 +1,81 @@
+from collections import Counter
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from slugify import slugify
-from sqlalchemy import select
+from sqlalchemy import delete, exists, insert, literal, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from madr.database import get_session
-from madr.models import Romancista, User
+from madr.bulk import import_romancistas, read_rows
+from madr.database import (
+    LazyReadSession,
+    get_lazy_read_session,
+    get_read_session,
+    get_session,
+)
+from madr.etag import conditional_get, entity_etag, list_etag
+from madr.export import export_response
+from madr.lookup import lookup
+from madr.models import Livro, LivrosPorAno, Romancista, User
+from madr.pagination import count_total, next_cursor, paginate
+from madr.profiling import timed
+from madr.response_cache import (
+    cache_page,
+    cached_page,
+    invalidate_livros,
+    invalidate_romancistas,
+    response_cache,
+)
 from madr.schemas import (
+    FilterRomancista,
+    ImportReport,
+    LookupIds,
     Message,
+    RomancistaImport,
     RomancistaList,
+    RomancistaListExpanded,
+    RomancistaLookup,
     RomancistaPublic,
     RomancistaSchema,
     RomancistaUpdate,
+    RomancistaWithLivros,
 )
+from madr.search import similarity_search
 from madr.security import get_current_user
+from madr.serialization import render
+from madr.stats import add_totals
+
+
+# Com Depends(FilterRomancista) o modelo seria montado no threadpool a
+# cada listagem.
+async def filter_romancista(  # noqa: PLR0913, PLR0917
+    offset: int | None = None,
+    limit: int | None = 20,
+    cursor: str | None = None,
+    order_by: Literal['id', 'nome'] = 'id',
+    with_total: bool = False,
+    nome: str | None = None,
+    expand: Literal['livros'] | None = None,
+):
+    return FilterRomancista(
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+        order_by=order_by,
+        with_total=with_total,
+        nome=nome,
+        expand=expand,
+    )
+
 
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_LazyReadSession = Annotated[LazyReadSession, Depends(get_lazy_read_session)]
+T_FilterRomancista = Annotated[FilterRomancista, Depends(filter_romancista)]
 
 
 router = APIRouter(prefix='/romancista', tags=['romancista'])
@@ -28,27 +84,55 @@ router = APIRouter(prefix='/romancista', tags=['romancista'])
 @router.post(
     '/', status_code=HTTPStatus.CREATED, response_model=RomancistaPublic
 )
-def create_romancista(
+async def create_romancista(
     romancista: RomancistaSchema,
     user: T_CurrentUser,
     session: T_Session,
 ):
-    db_romancista = session.scalar(
-        select(Romancista).where(Romancista.nome == romancista.nome)
-    )
+    nome = slugify(romancista.nome, separator=' ')
 
-    if db_romancista:
+    try:
+        db_romancista = await session.scalar(
+            insert(Romancista)
+            .from_select(
+                ['nome'],
+                select(literal(nome)).where(
+                    ~exists().where(
+                        Romancista.nome.in_([nome, romancista.nome])
+                    )
+                ),
+            )
+            .returning(Romancista)
+        )
+        await session.commit()
+
+    except IntegrityError:
+        await session.rollback()
+        db_romancista = None
+
+    if not db_romancista:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Romancista ja costa no MADR',
         )
 
-    db_romancista = Romancista(nome=slugify(romancista.nome, separator=' '))
-    session.add(db_romancista)
-    session.commit()
-    session.refresh(db_romancista)
+    invalidate_romancistas()
 
-    return db_romancista
+    return render(
+        RomancistaPublic, db_romancista, status_code=HTTPStatus.CREATED
+    )
+
+
+@router.post('/import', status_code=HTTPStatus.OK, response_model=ImportReport)
+async def import_romancista(
+    request: Request, user: T_CurrentUser, session: T_Session
+):
+    try:
+        return await import_romancistas(
+            session, read_rows(request, RomancistaImport)
+        )
+    finally:
+        invalidate_romancistas()
 
 
 @router.delete(
@@ -56,21 +140,42 @@ def create_romancista(
     status_code=HTTPStatus.OK,
     response_model=Message,
 )
-def delete_romancista(
+async def delete_romancista(
     romancista_id: int, user: T_CurrentUser, session: T_Session
 ):
-    romancista = session.scalar(
-        select(Romancista).where(Romancista.id == romancista_id)
+    # Trava o romancista antes de tudo: o FOR UPDATE conflita com o KEY
+    # SHARE da FK, então nenhum livro novo entra para ele até o commit.
+    locked = await session.scalar(
+        select(Romancista.id)
+        .where(Romancista.id == romancista_id)
+        .with_for_update()
     )
 
-    if not romancista:
+    if locked is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Romancista nao consta no MADR',
         )
 
-    session.delete(romancista)
-    session.commit()
+    # Os livros saem aqui e não pelo ON DELETE CASCADE: o RETURNING diz
+    # exatamente o que descontar das estatísticas.
+    anos = await session.scalars(
+        delete(Livro)
+        .where(Livro.romancista_id == romancista_id)
+        .returning(Livro.ano)
+    )
+    await add_totals(
+        session,
+        LivrosPorAno.ano,
+        {ano: -total for ano, total in Counter(anos).items()},
+    )
+    # O total em livros_por_romancista sai pelo ON DELETE CASCADE da FK
+    await session.execute(
+        delete(Romancista).where(Romancista.id == romancista_id)
+    )
+    await session.commit()
+    invalidate_romancistas()
+    invalidate_livros()
 
     return {'message': 'Romancista deletado(a) do MADR'}
 
@@ -80,15 +185,32 @@ def delete_romancista(
     status_code=HTTPStatus.OK,
     response_model=RomancistaPublic,
 )
-def patch_romancista(
+async def patch_romancista(
     romancista_id: int,
     user: T_CurrentUser,
     session: T_Session,
     romancista: RomancistaUpdate,
 ):
-    db_romancista = session.scalar(
-        select(Romancista).where(Romancista.id == romancista_id)
-    )
+    changes = romancista.model_dump(exclude_none=True)
+
+    if 'nome' in changes:
+        changes['nome'] = slugify(changes['nome'], separator=' ')
+
+    try:
+        db_romancista = await session.scalar(
+            update(Romancista)
+            .where(Romancista.id == romancista_id)
+            .values(**changes, version_id=Romancista.version_id + 1)
+            .returning(Romancista)
+        )
+        await session.commit()
+
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Este nome ja consta no MADR',
+        )
 
     if not db_romancista:
         raise HTTPException(
@@ -96,54 +218,157 @@ def patch_romancista(
             detail='Romancista nao consta no MADR',
         )
 
-    try:
-        for key, value in romancista.model_dump(exclude_unset=True).items():
-            setattr(db_romancista, key, value)
+    invalidate_romancistas()
 
-        db_romancista.nome = slugify(db_romancista.nome, separator=' ')
-        session.add(db_romancista)
-        session.commit()
-        session.refresh(db_romancista)
+    return render(RomancistaPublic, db_romancista)
 
-    except IntegrityError:
-        raise HTTPException(
-            status_code=HTTPStatus.CONFLICT,
-            detail='Este nome ja consta no MADR',
+
+@router.post(
+    '/lookup', status_code=HTTPStatus.OK, response_model=RomancistaLookup
+)
+async def lookup_romancista(lookup_ids: LookupIds, session: T_Session):
+    romancistas, missing = await lookup(session, Romancista, lookup_ids.ids)
+
+    return render(
+        RomancistaLookup, {'romancistas': romancistas, 'missing': missing}
+    )
+
+
+@router.get(
+    '/search', status_code=HTTPStatus.OK, response_model=RomancistaList
+)
+async def search_romancista(session: T_ReadSession, q: str, limit: int = 20):
+    term = slugify(q, separator=' ')
+
+    if not term:
+        return render(RomancistaList, {'romancistas': []})
+
+    romancistas = await session.scalars(
+        similarity_search(
+            Romancista.nome, term, session.bind.dialect.name, limit
         )
+    )
+
+    return render(RomancistaList, {'romancistas': romancistas.all()})
+
 
-    return db_romancista
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_romancista(
+    session: T_ReadSession, format: Literal['ndjson', 'csv'] = 'ndjson'
+):
+    query = select(Romancista.id, Romancista.nome).order_by(Romancista.id)
+
+    return export_response(session.bind, query, format, 'romancistas')
 
 
 @router.get(
     '/{romancista_id}',
     status_code=HTTPStatus.OK,
-    response_model=RomancistaPublic,
+    response_model=RomancistaWithLivros | RomancistaPublic,
 )
-def get_romancista(romancista_id: int, session: T_Session):
-    db_romancista = session.scalar(
-        select(Romancista).where(Romancista.id == romancista_id)
-    )
+async def get_romancista(
+    romancista_id: int,
+    session: T_ReadSession,
+    request: Request,
+    response: Response,
+    expand: Literal['livros'] | None = None,
+):
+    query = select(Romancista).where(Romancista.id == romancista_id)
+
+    if expand:
+        query = query.options(selectinload(Romancista.livros))
+
+    db_romancista = await session.scalar(query)
     if not db_romancista:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Romancista nao consta no MADR',
         )
 
-    return db_romancista
+    if expand:
+        model = RomancistaWithLivros
+        etag = list_etag('romancista', [db_romancista, *db_romancista.livros])
+    else:
+        model = RomancistaPublic
+        etag = entity_etag('romancista', db_romancista)
 
+    conditional_get(request, response, etag)
 
-@router.get('/', status_code=HTTPStatus.OK, response_model=RomancistaList)
-def list_romancista(
-    session: T_Session,
-    nome: str | None = None,
-    offset: int | None = None,
-    limit: int | None = 20,
+    return render(model, db_romancista, response, narrow=True)
+
+
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=RomancistaListExpanded | RomancistaList,
+)
+async def list_romancista(
+    read_session: T_LazyReadSession,
+    romancista_filter: T_FilterRomancista,
+    request: Request,
+    response: Response,
 ):
-    query = select(Romancista)
+    tags = ('romancistas',)
+    model = RomancistaList
+
+    if romancista_filter.expand:
+        # Qualquer escrita em livros muda a lista embutida
+        tags += ('livros', 'livros:all')
+        model = RomancistaListExpanded
+
+    key = response_cache.key(
+        'romancistas', tags, romancista_filter.model_dump(exclude_none=True)
+    )
+    cached = cached_page(request, key)
 
-    if nome:
-        query = query.filter(Romancista.nome.contains(nome))
+    if cached is None:
+        session = await read_session()
+        query = select(Romancista)
+
+        if romancista_filter.nome:
+            query = query.filter(
+                Romancista.nome.contains(romancista_filter.nome)
+            )
+
+        page_query = paginate(query, Romancista, romancista_filter)
+
+        if romancista_filter.expand:
+            page_query = page_query.options(selectinload(Romancista.livros))
+
+        list_romancistas = await session.scalars(page_query)
+        romancistas = list_romancistas.all()
+        cursor = next_cursor(romancistas, romancista_filter)
+        total = (
+            await count_total(session, query, Romancista)
+            if romancista_filter.with_total
+            else None
+        )
+        with timed('serialize'):
+            body = model.model_validate(
+                {
+                    'romancistas': romancistas,
+                    'next_cursor': cursor,
+                    'total': total,
+                },
+                from_attributes=True,
+            )
+            livros = (
+                [
+                    (livro.id, livro.version_id)
+                    for romancista in romancistas
+                    for livro in romancista.livros
+                ]
+                if romancista_filter.expand
+                else None
+            )
+            cached = {
+                'etag': list_etag(
+                    'romancistas', romancistas, cursor, total, livros
+                ),
+                'body': body.model_dump(mode='json'),
+            }
+        cache_page(session, key, cached)
 
-    list_romancistas = session.scalars(query.offset(offset).limit(limit)).all()
+    conditional_get(request, response, cached['etag'])
 
-    return {'romancistas': list_romancistas}
+    return render(model, cached['body'], response)
@@ -0,0 +1,17 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.database import get_read_session
+from madr.schemas import CatalogStats
+from madr.stats import catalog_stats
+
+router = APIRouter(prefix='/stats', tags=['stats'])
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+@router.get('/livros', status_code=HTTPStatus.OK, response_model=CatalogStats)
+async def get_livros_stats(session: T_ReadSession, limit: int = 100):
+    return await catalog_stats(session, limit)
@@ -5,24 +5,32 @@ from fastapi import APIRouter, Depends, HTTPException
 from slugify import slugify
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from madr.database import get_session
+from madr.hashing import hashing_pool
 from madr.models import User
+from madr.ratelimit import limit_account, limit_ip
 from madr.schemas import Message, UserPublic, UserSchema
-from madr.security import get_current_user, get_password_hash
+from madr.security import get_current_user, principal_cache
+from madr.serialization import render
 
 router = APIRouter(prefix='/users', tags=['users'])
 
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
 @router.post(
-    '/conta', status_code=HTTPStatus.CREATED, response_model=UserPublic
+    '/conta',
+    status_code=HTTPStatus.CREATED,
+    response_model=UserPublic,
+    dependencies=[Depends(limit_ip)],
 )
-def create_user(user: UserSchema, session: T_Session):
-    db_user = session.scalar(
+async def create_user(user: UserSchema, session: T_Session):
+    limit_account(user.email)
+
+    db_user = await session.scalar(
         select(User).where(
             (User.username == user.username) | (User.email == user.email)
         )
@@ -44,18 +52,18 @@ def create_user(user: UserSchema, session: T_Session):
     db_user = User(
         username=slugify(user.username, separator=' '),
         email=user.email,
-        password=get_password_hash(user.password),
+        password=await hashing_pool.hash(user.password),
     )
 
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
 
-    return db_user
+    return render(UserPublic, db_user, status_code=HTTPStatus.CREATED)
 
 
 @router.put('/conta/{user_id}', response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserSchema,
     session: T_Session,
@@ -66,29 +74,44 @@ def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Sem permissao'
         )
 
+    email = current_user.email
+    principal_cache.pop(email)
+
     try:
         current_user.username = slugify(user.username, separator=' ')
         current_user.email = user.email
-        current_user.password = get_password_hash(user.password)
+        current_user.password = await hashing_pool.hash(user.password)
 
-        session.commit()
-        session.refresh(current_user)
+        await session.commit()
+        await session.refresh(current_user)
 
     except IntegrityError:
+        await session.rollback()
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='username ou email ja existi',
         )
 
-    return current_user
+    finally:
+        # De novo depois do commit: durante o hash outra requisição com o
+        # token antigo pode ter relido a linha ainda não alterada.
+        principal_cache.pop(email)
+
+    return render(UserPublic, current_user)
 
 
 @router.delete('/conta/{user_id}', response_model=Message)
-def delete_user(user_id: int, session: T_Session, current_user: T_CurrentUser):
+async def delete_user(
+    user_id: int, session: T_Session, current_user: T_CurrentUser
+):
     if current_user.id != user_id:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Sem permissao'
         )
-    session.delete(current_user)
-    session.commit()
+
+    email = current_user.email
+    principal_cache.pop(email)
+    await session.delete(current_user)
+    await session.commit()
+    principal_cache.pop(email)
     return {'message': 'Conta deletada com sucesso'}
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserSchema(BaseModel):
@@ -23,6 +25,23 @@ class Message(BaseModel):
     message: str
 
 
+class FilterPage(BaseModel):
+    offset: int | None = None
+    limit: int | None = 20
+    cursor: str | None = None
+    order_by: str = 'id'
+    with_total: bool = False
+
+
+class Total(BaseModel):
+    value: int
+    kind: Literal['exact', 'estimated']
+
+
+class LookupIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+
+
 class RomancistaSchema(BaseModel):
     nome: str
 
@@ -35,8 +54,21 @@ class RomancistaUpdate(BaseModel):
     nome: str | None = None
 
 
+class FilterRomancista(FilterPage):
+    nome: str | None = None
+    order_by: Literal['id', 'nome'] = 'id'
+    expand: Literal['livros'] | None = None
+
+
 class RomancistaList(BaseModel):
     romancistas: list[RomancistaPublic]
+    next_cursor: str | None = None
+    total: Total | None = None
+
+
+class RomancistaLookup(BaseModel):
+    romancistas: list[RomancistaPublic]
+    missing: list[int]
 
 
 class LivroSchema(BaseModel):
@@ -54,5 +86,110 @@ class LivroUpdate(BaseModel):
     titulo: str | None = None
 
 
+class LivroWithRomancista(LivroPublic):
+    romancista: RomancistaPublic
+
+
+class RomancistaWithLivros(RomancistaPublic):
+    livros: list[LivroPublic]
+
+
+class RomancistaListExpanded(RomancistaList):
+    romancistas: list[RomancistaWithLivros]
+
+
+class LivroLookup(BaseModel):
+    livros: list[LivroPublic]
+    missing: list[int]
+
+
+class LivroBatchUpdate(LivroUpdate):
+    id: int
+
+
+class LivroBatchResult(BaseModel):
+    status: int
+    livro: LivroPublic | None = None
+    detail: str | None = None
+
+
+class LivroBatchReport(BaseModel):
+    results: list[LivroBatchResult]
+
+
+class FilterLivro(FilterPage):
+    ano: int | None = None
+    titulo: str | None = None
+    romancista_id: int | None = None
+    order_by: Literal['id', 'ano', 'titulo'] = 'id'
+    expand: Literal['romancista'] | None = None
+
+
 class LivroList(BaseModel):
     livros: list[LivroPublic]
+    next_cursor: str | None = None
+    total: Total | None = None
+
+
+class LivroListExpanded(LivroList):
+    livros: list[LivroWithRomancista]
+
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    timeout: float
+    checkouts: int
+    waits: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    timeouts: int
+
+
+class CacheStatus(BaseModel):
+    size: int
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+
+
+class RomancistaImport(BaseModel):
+    nome: str
+
+
+class LivroImport(BaseModel):
+    ano: int
+    titulo: str
+    romancista: str
+
+
+class ImportConflict(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    inserted: int
+    created_romancistas: int = 0
+    conflicts: list[ImportConflict]
+
+
+class AnoTotal(BaseModel):
+    ano: int
+    total: int
+
+
+class RomancistaTotal(BaseModel):
+    romancista_id: int
+    nome: str
+    total: int
+
+
+class CatalogStats(BaseModel):
+    livros: int
+    por_ano: list[AnoTotal]
+    por_romancista: list[RomancistaTotal]
@@ -0,0 +1,20 @@
+from sqlalchemy import func, literal, or_, select
+
+
+def similarity_search(column, term: str, dialect: str, limit: int):
+    model = column.class_
+    query = select(model)
+
+    if dialect == 'postgresql':
+        # LIKE e `<%` (word similarity) são atendidos pelo índice GIN
+        # gin_trgm_ops da coluna.
+        score = func.word_similarity(term, column)
+        query = query.where(
+            or_(column.contains(term), literal(term).op('<%')(column))
+        ).order_by(score.desc(), func.length(column), model.id)
+    else:
+        query = query.where(column.contains(term)).order_by(
+            func.instr(column, term), func.length(column), model.id
+        )
+
+    return query.limit(limit)
@@ -6,16 +6,33 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import decode, encode
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from zoneinfo import ZoneInfo
 
+from madr.cache import TTLCache
 from madr.database import get_session
 from madr.models import User
+from madr.profiling import timed
 from madr.settings import Settings
 
-pwd_context = PasswordHash.recommended()
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=Settings().ARGON2_TIME_COST,
+        memory_cost=Settings().ARGON2_MEMORY_COST,
+        parallelism=Settings().ARGON2_PARALLELISM,
+    ),
+))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+# Cache por processo: as rotas que alteram o usuário limpam só a entrada
+# deste worker, e os demais workers/máquinas seguem com a antiga até o
+# PRINCIPAL_CACHE_TTL expirar.
+principal_cache = TTLCache(
+    maxsize=Settings().PRINCIPAL_CACHE_SIZE,
+    ttl=Settings().PRINCIPAL_CACHE_TTL,
+)
 
 
 def get_password_hash(password: str):
@@ -26,6 +43,10 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
@@ -38,10 +59,15 @@ def create_access_token(data: dict):
     return encode_jwt
 
 
-def get_current_user(
-    session: Session = Depends(get_session),
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
 ):
+    with timed('auth'):
+        return await authenticate(session, token)
+
+
+async def authenticate(session: AsyncSession, token: str):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -63,9 +89,38 @@ def get_current_user(
     except PyJWTError:
         raise credentials_exception
 
-    user = session.scalar(select(User).where(User.email == username))
+    cached = principal_cache.get(username)
+
+    if cached:
+        return await attach_principal(session, cached)
+
+    user = await session.scalar(select(User).where(User.email == username))
 
     if not user:
         raise credentials_exception
 
+    principal_cache.set(
+        username,
+        {
+            'id': user.id,
+            'username': user.username,
+            'password': user.password,
+            'email': user.email,
+        },
+    )
+
     return user
+
+
+async def attach_principal(session: AsyncSession, principal: dict):
+    # Reconstrói o usuário a partir do cache e o anexa à sessão sem SELECT,
+    # para que update_user/delete_user continuem funcionando sobre ele.
+    user = User(
+        username=principal['username'],
+        password=principal['password'],
+        email=principal['email'],
+    )
+    user.id = principal['id']
+    make_transient_to_detached(user)
+
+    return await session.merge(user, load=False)
@@ -0,0 +1,213 @@
+import random
+from itertools import accumulate, islice
+from math import exp
+
+from slugify import slugify
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.models import Livro, Romancista, User
+from madr.stats import rebuild_stats
+
+
+def vocabulary(words: str):
+    # Já no formato de slugify(..., separator=' '), como as rotas gravam.
+    return [slugify(word, separator=' ') for word in words.split()]
+
+
+def zipf(size: int, exponent: float = 1.1):
+    return list(accumulate(1 / rank**exponent for rank in range(1, size + 1)))
+
+
+TITLE_WORDS = vocabulary(
+    'o a os as de do da dos das e em no na um uma sobre entre sem '
+    'amor tempo noite mar casa vida morte guerra terra sombra luz sol '
+    'lua cidade rio céu coração memória história segredo caminho sonho '
+    'silêncio jardim fogo água vento pedra livro carta viagem ilha '
+    'menino menina homem mulher rei rainha família irmão filho pai mãe '
+    'último primeiro velho nova grande pequeno perdido escondido '
+    'eterno triste feliz azul vermelho branco negro dourado antigo '
+    'dias anos horas cem mil sertão deserto floresta montanha estrada '
+    'janela porta espelho relógio retrato diário crônica canção '
+    'lenda mistério destino esperança saudade solidão liberdade'
+)
+FIRST_NAMES = vocabulary(
+    'maria ana francisca antônia adriana juliana márcia fernanda '
+    'patrícia aline joão josé antônio francisco carlos paulo pedro '
+    'lucas luiz marcos gabriel rafael daniel marcelo bruno eduardo '
+    'felipe raimundo rodrigo clarice cecília rachel lygia hilda '
+    'machado jorge graciliano érico guimarães conceição carolina '
+    'beatriz helena luísa isabel teresa rosa vitória alice laura'
+)
+SURNAMES = vocabulary(
+    'silva santos oliveira souza rodrigues ferreira alves pereira lima '
+    'gomes costa ribeiro martins carvalho almeida lopes soares '
+    'fernandes vieira barbosa rocha dias nascimento andrade moreira '
+    'nunes marques machado mendes freitas cardoso ramos gonçalves '
+    'santana teixeira moraes azevedo queiroz lispector amado meireles'
+)
+SYLLABLES = [
+    consonant + vowel for consonant in 'bcdfglmnprstv' for vowel in 'aeiou'
+]
+TITLE_LENGTHS = (0, 1, 2, 3, 4)
+TITLE_LENGTH_WEIGHTS = (5, 25, 35, 25, 10)
+TITLE_WEIGHTS = zipf(len(TITLE_WORDS))
+FIRST_NAME_WEIGHTS = zipf(len(FIRST_NAMES))
+SURNAME_WEIGHTS = zipf(len(SURNAMES))
+ANOS = range(1500, 2025)
+# Bem mais livros recentes que antigos: o peso cresce com o ano.
+ANO_WEIGHTS = list(accumulate(exp((ano - ANOS[-1]) / 60) for ano in ANOS))
+
+
+def invented_word(index: int) -> str:
+    # Numeração bijetiva em base len(SYLLABLES): cada índice positivo vira
+    # uma palavra diferente ('ba', 'be', ..., 'baba', ...), o que garante
+    # titulos e nomes únicos sem guardar os já gerados.
+    syllables = []
+    while index:
+        index, digit = divmod(index - 1, len(SYLLABLES))
+        syllables.append(SYLLABLES[digit])
+
+    return ''.join(reversed(syllables))
+
+
+def generate_titulos(rng: random.Random, start: int, count: int):
+    lengths = rng.choices(TITLE_LENGTHS, TITLE_LENGTH_WEIGHTS, k=count)
+    words = iter(
+        rng.choices(TITLE_WORDS, cum_weights=TITLE_WEIGHTS, k=sum(lengths))
+    )
+
+    return [
+        ' '.join([*islice(words, length), invented_word(start + offset)])
+        for offset, length in enumerate(lengths)
+    ]
+
+
+def generate_nomes(rng: random.Random, start: int, count: int):
+    first_names = rng.choices(
+        FIRST_NAMES, cum_weights=FIRST_NAME_WEIGHTS, k=count
+    )
+    surnames = rng.choices(SURNAMES, cum_weights=SURNAME_WEIGHTS, k=count)
+
+    return [
+        f'{first_name} {surname} {invented_word(start + offset)}'
+        for offset, (first_name, surname) in enumerate(
+            zip(first_names, surnames)
+        )
+    ]
+
+
+def generate_livros(rng: random.Random, start, count, romancista_ids):
+    anos = rng.choices(ANOS, cum_weights=ANO_WEIGHTS, k=count)
+    # Poucos romancistas com muitos livros: o quadrado concentra os
+    # sorteios no começo da lista.
+    romancistas = [
+        romancista_ids[int(len(romancista_ids) * rng.random() ** 2)]
+        for _ in range(count)
+    ]
+
+    return list(zip(anos, generate_titulos(rng, start, count), romancistas))
+
+
+def generate_users(rng: random.Random, start, count, password_hash):
+    return [
+        (nome, password_hash, f'{nome.replace(" ", ".")}@madr.com')
+        for nome in generate_nomes(rng, start, count)
+    ]
+
+
+async def next_index(session: AsyncSession, model):
+    # Continua a numeração de seeds anteriores em vez de repetir palavras.
+    return (await session.scalar(select(func.max(model.id)))) or 0
+
+
+async def copy_rows(session: AsyncSession, model, columns, batches):
+    connection = await session.connection()
+    table = model.__table__
+    total = 0
+
+    if connection.dialect.name != 'postgresql':
+        for rows in batches:
+            await connection.execute(
+                insert(table), [dict(zip(columns, row)) for row in rows]
+            )
+            total += len(rows)
+        return total
+
+    raw = await connection.get_raw_connection()
+    statement = f'COPY {table.name} ({", ".join(columns)}) FROM STDIN'
+
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy(statement) as copy:
+            for rows in batches:
+                # Os valores gerados não têm tab, quebra de linha nem barra
+                # invertida, então o formato texto do COPY vai sem escape.
+                await copy.write(
+                    ''.join('\t'.join(map(str, row)) + '\n' for row in rows)
+                )
+                total += len(rows)
+
+    return total
+
+
+def chunked(total: int, size: int):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+async def seed_database(  # noqa: PLR0913, PLR0917
+    session: AsyncSession,
+    romancistas: int,
+    livros: int,
+    users: int,
+    password_hash: str,
+    seed: int | None = None,
+    batch_size: int = 100000,
+):
+    rng = random.Random(seed)
+    counts = {}
+
+    start = await next_index(session, Romancista) + 1
+    counts['romancistas'] = await copy_rows(
+        session,
+        Romancista,
+        ['nome'],
+        (
+            [(nome,) for nome in generate_nomes(rng, start + offset, size)]
+            for offset, size in chunked(romancistas, batch_size)
+        ),
+    )
+
+    romancista_ids = (
+        await session.scalars(select(Romancista.id).order_by(Romancista.id))
+    ).all()
+    if livros and not romancista_ids:
+        raise ValueError('Nenhum romancista para associar aos livros')
+
+    start = await next_index(session, Livro) + 1
+    counts['livros'] = await copy_rows(
+        session,
+        Livro,
+        ['ano', 'titulo', 'romancista_id'],
+        (
+            generate_livros(rng, start + offset, size, romancista_ids)
+            for offset, size in chunked(livros, batch_size)
+        ),
+    )
+
+    start = await next_index(session, User) + 1
+    counts['users'] = await copy_rows(
+        session,
+        User,
+        ['username', 'password', 'email'],
+        (
+            generate_users(rng, start + offset, size, password_hash)
+            for offset, size in chunked(users, batch_size)
+        ),
+    )
+
+    # O COPY não passa pelos contadores de livros_por_ano e
+    # livros_por_romancista; o rebuild recalcula e faz o commit.
+    await rebuild_stats(session)
+
+    return counts
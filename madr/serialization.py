@@ -0,0 +1,63 @@
+from functools import cache
+from http import HTTPStatus
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from madr.profiling import timed
+from madr.settings import Settings
+
+settings = Settings()
+
+
+class FastJSONResponse(Response):
+    media_type = 'application/json'
+
+
+@cache
+def type_adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def dump_json(model, content) -> bytes:
+    adapter = type_adapter(model)
+
+    with timed('serialize'):
+        # Uma única validação (lendo os atributos do ORM) e a serialização
+        # direto para bytes no pydantic-core, sem o dict intermediário e o
+        # json.dumps do caminho padrão do FastAPI.
+        return adapter.dump_json(
+            adapter.validate_python(content, from_attributes=True)
+        )
+
+
+def dump_data(model, content):
+    adapter = type_adapter(model)
+
+    with timed('serialize'):
+        return adapter.dump_python(
+            adapter.validate_python(content, from_attributes=True),
+            mode='json',
+        )
+
+
+def render(
+    model,
+    content,
+    response: Response | None = None,
+    status_code: HTTPStatus = HTTPStatus.OK,
+    narrow: bool = False,
+):
+    if not settings.FAST_JSON:
+        # Em rotas com response_model em union (expand), valida aqui com o
+        # modelo escolhido: o FastAPI testaria cada membro no objeto do ORM
+        # e acabaria disparando lazy loads das relações.
+        return dump_data(model, content) if narrow else content
+
+    # Retornar um Response faz o FastAPI pular o response_model, então os
+    # cabeçalhos já definidos (ETag, Cache-Control) são copiados aqui.
+    return FastJSONResponse(
+        dump_json(model, content),
+        status_code=status_code,
+        headers=None if response is None else dict(response.headers),
+    )
@@ -9,3 +9,43 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = False
+
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_RETRY: float = 30
+    DATABASE_REPLICA_CONNECT_TIMEOUT: int = 2
+    DATABASE_READ_YOUR_WRITES: int = 5
+
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: float = 60
+
+    HTTP_CACHE_MAX_AGE: int = 0
+    EXACT_COUNT_THRESHOLD: int = 10000
+
+    FAST_JSON: bool = False
+
+    SLOW_QUERY_MS: float = 200
+    N_PLUS_ONE_THRESHOLD: int = 10
+
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL: float = 30
+    RESPONSE_CACHE_REPLICA_TTL: float = 1
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PERIOD: float = 60
+    RATE_LIMIT_IP_REQUESTS: int = 20
+    RATE_LIMIT_ACCOUNT_REQUESTS: int = 5
+    RATE_LIMIT_SIZE: int = 65536
+    RATE_LIMIT_CLIENT_IP_HEADER: str | None = None
+
+    HASHING_WORKERS: int = 2
+    HASHING_MAX_PENDING: int = 16
+
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
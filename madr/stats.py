@@ -0,0 +1,103 @@
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.database import DIALECT_INSERTS
+from madr.models import Livro, LivrosPorAno, LivrosPorRomancista, Romancista
+
+
+async def add_totals(session: AsyncSession, column, deltas: dict):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+
+    if not deltas:
+        return
+
+    model = column.class_
+    dialect_insert = DIALECT_INSERTS[session.bind.dialect.name]
+    # Chaves ordenadas: transações concorrentes travam as linhas na mesma
+    # ordem e não entram em deadlock.
+    statement = dialect_insert(model).values([
+        {column.key: key, 'total': delta}
+        for key, delta in sorted(deltas.items())
+    ])
+
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[column.key],
+            set_={'total': model.total + statement.excluded.total},
+        )
+    )
+
+
+async def track_livros(session: AsyncSession, livros, sign: int = 1):
+    # livros: pares (ano, romancista_id) inseridos (sign=1) ou removidos (-1)
+    anos, romancistas = Counter(), Counter()
+    for ano, romancista_id in livros:
+        anos[ano] += sign
+        romancistas[romancista_id] += sign
+
+    await add_totals(session, LivrosPorAno.ano, anos)
+    await add_totals(session, LivrosPorRomancista.romancista_id, romancistas)
+
+
+async def move_livros(session: AsyncSession, anos):
+    # anos: pares (ano antigo, ano novo) de livros alterados
+    deltas = Counter()
+    for old_ano, new_ano in anos:
+        deltas[old_ano] -= 1
+        deltas[new_ano] += 1
+
+    await add_totals(session, LivrosPorAno.ano, deltas)
+
+
+async def rebuild_stats(session: AsyncSession):
+    await session.execute(delete(LivrosPorAno))
+    await session.execute(delete(LivrosPorRomancista))
+    await session.execute(
+        insert(LivrosPorAno).from_select(
+            ['ano', 'total'],
+            select(Livro.ano, func.count()).group_by(Livro.ano),
+        )
+    )
+    await session.execute(
+        insert(LivrosPorRomancista).from_select(
+            ['romancista_id', 'total'],
+            select(Livro.romancista_id, func.count()).group_by(
+                Livro.romancista_id
+            ),
+        )
+    )
+    await session.commit()
+
+
+async def catalog_stats(session: AsyncSession, limit: int):
+    por_ano = (
+        await session.execute(
+            select(LivrosPorAno.ano, LivrosPorAno.total)
+            .where(LivrosPorAno.total > 0)
+            .order_by(LivrosPorAno.ano)
+        )
+    ).all()
+    por_romancista = (
+        await session.execute(
+            select(
+                LivrosPorRomancista.romancista_id,
+                Romancista.nome,
+                LivrosPorRomancista.total,
+            )
+            .join(Romancista)
+            .where(LivrosPorRomancista.total > 0)
+            .order_by(
+                LivrosPorRomancista.total.desc(),
+                LivrosPorRomancista.romancista_id,
+            )
+            .limit(limit)
+        )
+    ).all()
+
+    return {
+        'livros': sum(row.total for row in por_ano),
+        'por_ano': [row._asdict() for row in por_ano],
+        'por_romancista': [row._asdict() for row in por_romancista],
+    }
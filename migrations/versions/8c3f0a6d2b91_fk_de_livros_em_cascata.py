@@ -0,0 +1,52 @@
+"""FK de livros em cascata
+
+Revision ID: 8c3f0a6d2b91
+Revises: 5e2a9c1b7d08
+Create Date: 2026-10-18 16:02:44.871530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f0a6d2b91'
+down_revision: Union[str, None] = '5e2a9c1b7d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # O DELETE de romancista passa a apagar os livros no proprio banco.
+    # A FK nova entra como NOT VALID, num passo rápido sob o lock do
+    # ALTER TABLE.
+    op.drop_constraint('livros_romancista_id_fkey', 'livros', type_='foreignkey')
+    op.create_foreign_key(
+        'livros_romancista_id_fkey',
+        'livros',
+        'romancista',
+        ['romancista_id'],
+        ['id'],
+        ondelete='CASCADE',
+        postgresql_not_valid=True,
+    )
+    # O autocommit_block faz o commit do passo acima antes de validar:
+    # o VALIDATE só pega SHARE UPDATE EXCLUSIVE e a varredura não bloqueia
+    # escritas em livros.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'ALTER TABLE livros VALIDATE CONSTRAINT livros_romancista_id_fkey'
+        )
+
+
+def downgrade() -> None:
+    op.drop_constraint('livros_romancista_id_fkey', 'livros', type_='foreignkey')
+    op.create_foreign_key(
+        'livros_romancista_id_fkey',
+        'livros',
+        'romancista',
+        ['romancista_id'],
+        ['id'],
+    )
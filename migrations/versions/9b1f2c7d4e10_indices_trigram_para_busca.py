@@ -0,0 +1,62 @@
+"""Indices trigram para busca
+
+Revision ID: 9b1f2c7d4e10
+Revises: 6440ce475198
+Create Date: 2026-10-18 10:12:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f2c7d4e10'
+down_revision: Union[str, None] = '6440ce475198'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY não roda dentro de transação e não bloqueia
+    # escritas nas tabelas enquanto o índice é construído.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_livros_titulo_trgm',
+            'livros',
+            ['titulo'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'titulo': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_romancista_nome_trgm',
+            'romancista',
+            ['nome'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'nome': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_romancista_nome_trgm',
+            table_name='romancista',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_livros_titulo_trgm',
+            table_name='livros',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,56 @@
+"""Indices secundarios de livros
+
+Revision ID: d41c8a5e7f32
+Revises: 9b1f2c7d4e10
+Create Date: 2026-10-18 11:03:27.504112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c8a5e7f32'
+down_revision: Union[str, None] = '9b1f2c7d4e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Construídos com CONCURRENTLY para que o `alembic upgrade head` do
+    # entrypoint.sh não bloqueie escritas em livros em produção.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_livros_ano_id',
+            'livros',
+            ['ano', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_livros_romancista_id',
+            'livros',
+            ['romancista_id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_livros_romancista_id',
+            table_name='livros',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_livros_ano_id',
+            table_name='livros',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from madr.database import MonitoredPool, pool_status
+from madr.settings import Settings
+
+
+def test_get_pool_status(client, token):
+    response = client.get(
+        '/admin/pool', headers={'Authorization': f'Bearer {token}'}
+    )
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['size'] == Settings().DATABASE_POOL_SIZE
+    assert data['max_overflow'] == Settings().DATABASE_MAX_OVERFLOW
+    assert data['timeout'] == Settings().DATABASE_POOL_TIMEOUT
+    assert data['checked_out'] >= 0
+    assert data['timeouts'] == 0
+
+
+def test_get_pool_status_without_token(client):
+    response = client.get('/admin/pool')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_get_principal_cache_status(client, token):
+    response = client.get(
+        '/admin/cache/principals',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['maxsize'] == Settings().PRINCIPAL_CACHE_SIZE
+    assert data['size'] == 1
+    assert data['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_only_checkouts_that_waited():
+    engine = create_async_engine(
+        'sqlite+aiosqlite://',
+        poolclass=MonitoredPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+
+    try:
+        async with engine.connect():
+            pass
+        async with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                await engine.connect()
+
+        status = pool_status(engine.pool)
+    finally:
+        await engine.dispose()
+
+    assert status['checkouts'] == 3  # noqa: PLR2004
+    assert status['waits'] == 1
+    assert status['timeouts'] == 1
@@ -1,6 +1,12 @@
 from http import HTTPStatus
 
+import pytest
 from freezegun import freeze_time
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from madr.models import User
+from madr.security import pwd_context, verify_password
 
 
 def test_get_token(client, user):
@@ -102,3 +108,35 @@ def test_token_expired_dont_refresh(client, user):
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_get_token_rehashes_outdated_password(client, session):
+    outdated_hash = PasswordHash((
+        Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),
+    )).hash('123')
+    user = User(username='old', email='old@test.com', password=outdated_hash)
+    session.add(user)
+    await session.commit()
+
+    response = client.post(
+        '/auth/token', data={'username': user.email, 'password': '123'}
+    )
+    await session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert user.password != outdated_hash
+    assert verify_password('123', user.password)
+    assert not pwd_context.current_hasher.check_needs_rehash(user.password)
+
+
+def test_get_token_keeps_current_password_hash(client, user):
+    password_hash = user.password
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert user.password == password_hash
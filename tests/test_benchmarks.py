@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+import pytest
+
+from benchmarks import __main__ as benchmarks_main
+from benchmarks.load import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == 50  # noqa: PLR2004
+    assert percentile(values, 0.95) == 95  # noqa: PLR2004
+    assert percentile(values, 0.99) == 99  # noqa: PLR2004
+    assert percentile([7], 0.99) == 7  # noqa: PLR2004
+
+
+def test_summarize_reports_latency_and_throughput():
+    latencies = defaultdict(list, {'GET /livro/': [0.01, 0.02, 0.03, 0.04]})
+    errors = defaultdict(int, {'POST /livro/': 2})
+
+    assert summarize(latencies, errors, elapsed=2) == {
+        'GET /livro/': {
+            'requests': 4,
+            'errors': 0,
+            'rps': 2.0,
+            'p50_ms': 20.0,
+            'p95_ms': 40.0,
+            'p99_ms': 40.0,
+            'mean_ms': 25.0,
+        },
+        'POST /livro/': {'requests': 2, 'errors': 2, 'rps': 0.0},
+    }
+
+
+def test_compare_flags_p95_regressions():
+    def report(p95, rps):
+        return {
+            'endpoints': {
+                'GET /livro/': {
+                    'rps': rps,
+                    'p50_ms': 10,
+                    'p95_ms': p95,
+                    'p99_ms': 50,
+                }
+            }
+        }
+
+    rows, regressions = compare(report(20, 100), report(25, 80), threshold=10)
+
+    assert rows == [
+        {
+            'endpoint': 'GET /livro/',
+            'rps': -20.0,
+            'p50_ms': 0.0,
+            'p95_ms': 25.0,
+            'p99_ms': 0.0,
+        }
+    ]
+    assert regressions == ['GET /livro/']
+
+
+def test_seed_requires_confirmation(monkeypatch):
+    seeded = []
+    monkeypatch.setattr(benchmarks_main, 'run_seed', seeded.append)
+
+    with pytest.raises(SystemExit) as ex:
+        benchmarks_main.main(['seed'])
+
+    assert 'confirme com --yes' in str(ex.value)
+    assert not seeded
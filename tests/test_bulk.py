@@ -0,0 +1,299 @@
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import event, select
+
+from madr.bulk import read_rows
+from madr.models import Livro, Romancista
+from madr.schemas import RomancistaImport
+
+
+def test_import_livros_ndjson(client, token, romancista, other_livro):
+    body = '\n'.join([
+        '{"ano": 1987, "titulo": "Café da Manhã", "romancista": "test"}',
+        '{"ano": 1990, "titulo": "Novo Livro", "romancista": "Outro Autor"}',
+        '{"ano": 1990, "titulo": "novo livro", "romancista": "test"}',
+        '{"ano": 1999, "titulo": "OtherLivroTitulo", "romancista": "test"}',
+        '{"ano": "abc", "titulo": "x", "romancista": "test"}',
+        'nao e json',
+    ])
+
+    response = client.post(
+        '/livro/import',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+        content=body.encode(),
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'inserted': 2,
+        'created_romancistas': 1,
+        'conflicts': [
+            {'line': 3, 'detail': 'Titulo repetido no arquivo'},
+            {'line': 4, 'detail': 'Livro ja consta no MADR'},
+            {'line': 5, 'detail': 'Linha invalida'},
+            {'line': 6, 'detail': 'Linha invalida'},
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_livros_csv(session, client, token, romancista):
+    body = 'ano,titulo,romancista\r\n1999,"Duna, Parte 1",test\r\n2001,Eu,test'
+
+    response = client.post(
+        '/livro/import',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv',
+        },
+        content=body.encode(),
+    )
+    titulos = await session.scalars(select(Livro.titulo).order_by(Livro.id))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['inserted'] == 2  # noqa: PLR2004
+    assert titulos.all() == ['duna parte 1', 'eu']
+
+
+def test_import_livros_unsupported_media_type(client, token):
+    response = client.post(
+        '/livro/import',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/xml',
+        },
+        content=b'<livro/>',
+    )
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+def test_import_livros_without_token(client):
+    response = client.post('/livro/import', content=b'')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_import_romancistas(session, client, token, romancista):
+    response = client.post(
+        '/romancista/import',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv',
+        },
+        content=b'nome\nMachado de Assis\nTEST\nmachado de assis\n!!!\n',
+    )
+    nomes = await session.scalars(select(Romancista.nome))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'inserted': 1,
+        'created_romancistas': 0,
+        'conflicts': [
+            {'line': 3, 'detail': 'Romancista ja consta no MADR'},
+            {'line': 4, 'detail': 'Nome repetido no arquivo'},
+            {'line': 5, 'detail': 'Linha invalida'},
+        ],
+    }
+    assert set(nomes.all()) == {'test', 'machado de assis'}
+
+
+class ChunkedRequest:
+    def __init__(self, content_type, chunks):
+        self.headers = {'content-type': content_type}
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_read_rows_joins_lines_split_across_chunks():
+    request = ChunkedRequest(
+        'application/x-ndjson',
+        [b'{"nome": "ma', b'chado"}\n{"no', b'me": "alencar"}'],
+    )
+
+    rows = [
+        (line, row.nome)
+        async for line, row in read_rows(request, RomancistaImport)
+    ]
+
+    assert rows == [(1, 'machado'), (2, 'alencar')]
+
+
+def test_create_livro_batch(client, token, romancista, other_livro):
+    response = client.post(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'ano': 1987, 'titulo': 'Café da Manhã', 'romancista_id': 1},
+            {'ano': 1990, 'titulo': 'OtherLivroTitulo', 'romancista_id': 1},
+            {'ano': 1990, 'titulo': 'cafe da manha', 'romancista_id': 1},
+            {'ano': 1990, 'titulo': 'sem romancista', 'romancista_id': 99},
+            {'ano': 2001, 'titulo': 'Eu', 'romancista_id': 1},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'results': [
+            {
+                'status': 200,
+                'livro': {
+                    'id': 2,
+                    'ano': 1987,
+                    'titulo': 'cafe da manha',
+                    'romancista_id': 1,
+                },
+                'detail': None,
+            },
+            {
+                'status': 409,
+                'livro': None,
+                'detail': 'Livro ja consta no MADR',
+            },
+            {
+                'status': 409,
+                'livro': None,
+                'detail': 'Titulo repetido no lote',
+            },
+            {
+                'status': 404,
+                'livro': None,
+                'detail': 'Romancista nao consta no MADR',
+            },
+            {
+                'status': 200,
+                'livro': {
+                    'id': 3,
+                    'ano': 2001,
+                    'titulo': 'eu',
+                    'romancista_id': 1,
+                },
+                'detail': None,
+            },
+        ]
+    }
+
+
+@contextmanager
+def write_before(engine, prefix: str, sql: str):
+    # Simula outra requisição que escreve logo antes do comando `prefix`
+    pending = [sql]
+
+    def concurrent_write(conn, cursor, statement, *args):
+        if pending and statement.startswith(prefix):
+            conn.exec_driver_sql(pending.pop())
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', concurrent_write)
+    try:
+        yield
+    finally:
+        event.remove(
+            engine.sync_engine, 'before_cursor_execute', concurrent_write
+        )
+
+
+def test_create_livro_batch_romancista_deleted_meanwhile(
+    engine, client, token, romancista
+):
+    with write_before(engine, 'INSERT INTO livros', 'DELETE FROM romancista'):
+        response = client.post(
+            '/livro/batch',
+            headers={'Authorization': f'Bearer {token}'},
+            json=[{'ano': 1987, 'titulo': 'novo', 'romancista_id': 1}],
+        )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Romancista nao consta mais no MADR'}
+
+
+def test_create_livro_batch_too_large(client, token):
+    response = client.post(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'ano': 1, 'titulo': 'x', 'romancista_id': 1}] * 1001,
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_patch_livro_batch(client, token, livro, other_livro):
+    response = client.patch(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'id': livro.id, 'ano': 1958},
+            {'id': 99, 'ano': 1958},
+            {'id': other_livro.id, 'titulo': 'O Mundo Assombrado'},
+            {'id': livro.id, 'titulo': 'repetido'},
+            {'id': 3, 'titulo': 'o mundo assombrado'},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item['status'] for item in response.json()['results']] == [
+        200,
+        404,
+        200,
+        409,
+        404,
+    ]
+    assert response.json()['results'][0]['livro'] == {
+        'id': livro.id,
+        'ano': 1958,
+        'titulo': 'o mundo assombrado pelos demônios',
+        'romancista_id': 1,
+    }
+    assert response.json()['results'][2]['livro']['titulo'] == (
+        'o mundo assombrado'
+    )
+    assert response.json()['results'][3]['detail'] == 'Livro repetido no lote'
+
+
+def test_patch_livro_batch_livro_deleted_meanwhile(
+    engine, client, token, livro, other_livro
+):
+    with write_before(
+        engine, 'UPDATE livros', f'DELETE FROM livros WHERE id = {livro.id}'
+    ):
+        response = client.patch(
+            '/livro/batch',
+            headers={'Authorization': f'Bearer {token}'},
+            json=[
+                {'id': livro.id, 'ano': 1958},
+                {'id': other_livro.id, 'ano': 1958},
+            ],
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item['status'] for item in response.json()['results']] == [
+        404,
+        200,
+    ]
+
+
+def test_patch_livro_batch_titulo_already_exist(
+    client, token, livro, other_livro
+):
+    response = client.patch(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'id': livro.id, 'titulo': other_livro.titulo}],
+    )
+
+    assert response.json()['results'] == [
+        {
+            'status': 409,
+            'livro': None,
+            'detail': 'Este titulo ja consta no MADR',
+        }
+    ]
@@ -0,0 +1,60 @@
+import pytest
+
+from madr.cache import (
+    LocalStore,
+    MemoryBackend,
+    ResponseCache,
+    SharedBackend,
+)
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def cache(request):
+    if request.param == 'memory':
+        return ResponseCache(MemoryBackend(maxsize=8, ttl=60))
+
+    return ResponseCache(SharedBackend(LocalStore(), ttl=60))
+
+
+def test_response_cache_key_normalizes_params(cache):
+    assert cache.key('livros', ('livros',), {'a': 1, 'b': 2}) == cache.key(
+        'livros', ('livros',), {'b': 2, 'a': 1}
+    )
+
+
+def test_response_cache_get_and_set(cache):
+    key = cache.key('livros', ('livros',), {'ano': 1999})
+    cache.set(key, {'body': [1, 2]})
+
+    assert cache.get(key) == {'body': [1, 2]}
+
+
+def test_response_cache_invalidate_changes_key(cache):
+    key = cache.key('livros', ('livros', 'livros:ano:1999'), {'ano': 1999})
+    cache.set(key, {'body': [1]})
+
+    cache.invalidate('livros:ano:1999')
+
+    new_key = cache.key('livros', ('livros', 'livros:ano:1999'), {'ano': 1999})
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_response_cache_invalidate_keeps_other_tags(cache):
+    key = cache.key('livros', ('livros', 'livros:ano:1999'), {'ano': 1999})
+
+    cache.invalidate('livros:ano:2000')
+
+    assert (
+        cache.key('livros', ('livros', 'livros:ano:1999'), {'ano': 1999})
+        == key
+    )
+
+
+def test_local_store_expires(monkeypatch):
+    store = LocalStore()
+    store.set('key', 'value', ex=1)
+
+    monkeypatch.setattr('madr.cache.monotonic', lambda: float('inf'))
+
+    assert store.get('key') is None
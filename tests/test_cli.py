@@ -0,0 +1,79 @@
+from madr.cli import calibrate_argon2, main
+
+
+def test_calibrate_argon2_respects_limits():
+    result = calibrate_argon2(
+        target_ms=1000,
+        parallelism=1,
+        min_memory=1024,
+        max_memory=2048,
+        max_time_cost=2,
+        samples=1,
+    )
+
+    assert result['memory_cost'] in {1024, 2048}
+    assert 1 <= result['time_cost'] <= 2  # noqa: PLR2004
+    assert result['parallelism'] == 1
+    assert result['verify_ms'] > 0
+
+
+def test_calibrate_argon2_with_unreachable_target():
+    result = calibrate_argon2(
+        target_ms=0,
+        parallelism=1,
+        min_memory=1024,
+        max_memory=4096,
+        max_time_cost=5,
+        samples=1,
+    )
+
+    assert result['memory_cost'] == 1024  # noqa: PLR2004
+    assert result['time_cost'] == 1
+
+
+def test_calibrate_command_prints_settings(capsys):
+    main([
+        'calibrate',
+        '--target-ms',
+        '0',
+        '--min-memory',
+        '1024',
+        '--max-memory',
+        '1024',
+        '--samples',
+        '1',
+    ])
+
+    output = capsys.readouterr().out
+    assert 'ARGON2_TIME_COST=1' in output
+    assert 'ARGON2_MEMORY_COST=1024' in output
+    assert 'ARGON2_PARALLELISM=' in output
+
+
+def test_stats_rebuild_command(capsys, monkeypatch):
+    calls = []
+
+    async def fake_rebuild():
+        calls.append('rebuild')
+
+    monkeypatch.setattr('madr.cli.run_rebuild_stats', fake_rebuild)
+
+    main(['stats', 'rebuild'])
+
+    assert calls == ['rebuild']
+    assert 'Estatisticas recalculadas' in capsys.readouterr().out
+
+
+def test_seed_command(capsys, monkeypatch):
+    calls = []
+
+    async def fake_seed(args):
+        calls.append((args.romancistas, args.livros, args.users))
+        return {'romancistas': 2, 'livros': 10, 'users': 1}
+
+    monkeypatch.setattr('madr.cli.run_seed', fake_seed)
+
+    main(['seed', '--romancistas', '2', '--livros', '10', '--users', '1'])
+
+    assert calls == [(2, 10, 1)]
+    assert '2 romancistas, 10 livros e 1 usuarios' in capsys.readouterr().out
@@ -1,33 +1,51 @@
-from sqlalchemy import select
+import pytest
+from sqlalchemy import inspect, select
 
 from madr.models import Livro, Romancista, User
 
 
-def test_create_user_on_db(session):
+@pytest.mark.asyncio
+async def test_create_user_on_db(session):
     user = User(username='gui', email='test@test.com', password='123')
     session.add(user)
-    session.commit()
-    result = session.scalar(select(User).where(User.username == user.username))
+    await session.commit()
+    result = await session.scalar(
+        select(User).where(User.username == user.username)
+    )
     assert result
 
 
-def test_create_romancista_on_db(session):
+@pytest.mark.asyncio
+async def test_create_romancista_on_db(session):
     romancista = Romancista(nome='test')
     session.add(romancista)
-    session.commit()
-    result = session.scalar(
+    await session.commit()
+    result = await session.scalar(
         select(Romancista).where(Romancista.nome == romancista.nome)
     )
     assert result
 
 
-def teste_create_livro_on_db(session, romancista):
+@pytest.mark.asyncio
+async def teste_create_livro_on_db(session, romancista):
     livro = Livro(
         ano=1999,
         titulo='o mundo assombrado pelos demônios',
         romancista_id=romancista.id,
     )
     session.add(livro)
-    session.commit()
-    result = session.scalar(select(Livro).where(Livro.ano == livro.ano))
+    await session.commit()
+    result = await session.scalar(select(Livro).where(Livro.ano == livro.ano))
     assert result
+
+
+@pytest.mark.asyncio
+async def test_livros_secondary_indexes(session):
+    connection = await session.connection()
+    indexes = await connection.run_sync(
+        lambda conn: inspect(conn).get_indexes('livros')
+    )
+    columns = {index['name']: index['column_names'] for index in indexes}
+
+    assert columns['ix_livros_ano_id'] == ['ano', 'id']
+    assert columns['ix_livros_romancista_id'] == ['romancista_id']
@@ -0,0 +1,68 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from benchmarks.factories import LivroFactory, RomancistaFactory
+from madr import export
+
+
+@pytest.mark.asyncio
+async def test_export_livro_ndjson(session, client, romancista, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 2)
+    session.add_all(LivroFactory.create_batch(5))
+    await session.commit()
+
+    response = client.get('/livro/export')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [row['id'] for row in rows] == [1, 2, 3, 4, 5]
+    assert set(rows[0]) == {'id', 'ano', 'titulo', 'romancista_id'}
+
+
+def test_export_livro_expand_romancista(client, livro, romancista):
+    response = client.get('/livro/export?expand=romancista')
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.text) == {
+        'id': livro.id,
+        'ano': 1999,
+        'titulo': 'o mundo assombrado pelos demônios',
+        'romancista_id': romancista.id,
+        'romancista': {'id': romancista.id, 'nome': 'test'},
+    }
+
+
+def test_export_livro_csv(client, livro):
+    response = client.get('/livro/export?format=csv&expand=romancista')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert (
+        'attachment; filename="livros.csv"'
+        in (response.headers['content-disposition'])
+    )
+    assert response.text.splitlines() == [
+        'id,ano,titulo,romancista_id,romancista_nome',
+        '1,1999,o mundo assombrado pelos demônios,1,test',
+    ]
+
+
+def test_export_romancista_csv_empty(client):
+    response = client.get('/romancista/export?format=csv')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.text.splitlines() == ['id,nome']
+
+
+@pytest.mark.asyncio
+async def test_export_romancista_ndjson(session, client):
+    session.add_all(RomancistaFactory.create_batch(2))
+    await session.commit()
+
+    response = client.get('/romancista/export')
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.text.splitlines()) == 2  # noqa: PLR2004
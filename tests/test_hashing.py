@@ -0,0 +1,94 @@
+import os
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from madr.hashing import HashingPool, hashing_pool
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_hash_and_verify():
+    pool = HashingPool(workers=1, max_pending=0)
+
+    try:
+        password_hash = await pool.hash('test')
+        assert await pool.verify('test', password_hash)
+        assert not await pool.verify('wrong', password_hash)
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_full():
+    pool = HashingPool(workers=1, max_pending=0)
+    pool.pending = 1
+
+    with pytest.raises(HTTPException) as ex:
+        await pool.hash('test')
+
+    assert ex.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert ex.value.headers == {'Retry-After': '1'}
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_recovers_from_dead_worker():
+    pool = HashingPool(workers=1, max_pending=0)
+
+    try:
+        with pytest.raises(HTTPException) as ex:
+            await pool.run(os._exit, 1)
+
+        assert ex.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert ex.value.headers == {'Retry-After': '1'}
+        assert pool.pending == 0
+
+        password_hash = await pool.hash('test')
+        assert await pool.verify('test', password_hash)
+    finally:
+        pool.shutdown()
+
+
+def test_hashing_pool_does_not_fork_the_server():
+    pool = HashingPool(workers=1, max_pending=0)
+
+    try:
+        context = pool._get_executor()._mp_context
+        assert context.get_start_method() == 'forkserver'
+    finally:
+        pool.shutdown()
+
+
+def test_get_token_hashing_pool_full(client, user, monkeypatch):
+    monkeypatch.setattr(
+        hashing_pool,
+        'pending',
+        hashing_pool.workers + hashing_pool.max_pending,
+    )
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Servico de autenticacao ocupado'}
+
+
+def test_create_user_hashing_pool_full(client, monkeypatch):
+    monkeypatch.setattr(
+        hashing_pool,
+        'pending',
+        hashing_pool.workers + hashing_pool.max_pending,
+    )
+
+    response = client.post(
+        '/users/conta',
+        json={
+            'username': 'test',
+            'email': 'test@test.com',
+            'password': 'password',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
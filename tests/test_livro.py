@@ -1,6 +1,12 @@
 from http import HTTPStatus
 
-from tests.conftest import LivroFactory
+import pytest
+from fastapi.dependencies import utils as dependency_utils
+
+from benchmarks.factories import LivroFactory
+from madr.models import Livro
+from madr.pagination import encode_cursor, settings
+from madr.schemas import FilterLivro
 
 
 def test_create_livro(client, token, romancista):
@@ -38,6 +44,59 @@ def test_create_livro_already_existent(client, token, livro, romancista):
     assert response.json() == {'detail': 'Livro ja consta no MADR'}
 
 
+def test_create_livro_romancista_not_found(client, token, romancista):
+    response = client.post(
+        '/livro',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': 1999, 'titulo': 'sem autor', 'romancista_id': 999},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Romancista nao consta no MADR'}
+
+
+def test_create_livro_slugified_titulo_conflict(client, token, romancista):
+    def create(titulo):
+        return client.post(
+            '/livro',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'ano': 1999, 'titulo': titulo, 'romancista_id': 1},
+        )
+
+    assert create('Café da Manhã').status_code == HTTPStatus.OK
+
+    response = create('cafe da manha')
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Livro ja consta no MADR'}
+
+
+def test_create_livro_sanitized_titulo_already_exist(client, token, livro):
+    response = client.post(
+        '/livro',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'ano': 1999,
+            'titulo': 'O Mundo Assombrado pelos Demonios!',
+            'romancista_id': livro.romancista_id,
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/livro',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'ano': 2001,
+            'titulo': 'o mundo assombrado pelos demonios',
+            'romancista_id': livro.romancista_id,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Livro ja consta no MADR'}
+
+
 def test_delete_livro(client, token, livro):
     response = client.delete(
         f'/livro/{livro.id}', headers={'Authorization': f'Bearer {token}'}
@@ -135,6 +194,36 @@ def test_get_livro_by_id(client, livro):
     }
 
 
+def test_get_livro_by_id_etag(client, livro):
+    response = client.get(f'/livro/{livro.id}')
+
+    assert response.headers['etag'] == '"livro-1.1"'
+    assert 'must-revalidate' in response.headers['cache-control']
+
+    response = client.get(
+        f'/livro/{livro.id}', headers={'If-None-Match': '"livro-1.1"'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b''
+    assert response.headers['etag'] == '"livro-1.1"'
+
+
+def test_get_livro_by_id_etag_changes_after_patch(client, token, livro):
+    client.patch(
+        f'/livro/{livro.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': 1958},
+    )
+
+    response = client.get(
+        f'/livro/{livro.id}', headers={'If-None-Match': '"livro-1.1"'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] == '"livro-1.2"'
+
+
 def test_get_livro_by_id_not_found(client, livro):
     response = client.get('/livro/99')
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -152,27 +241,98 @@ def test_list_livro(client, livro):
                 'titulo': 'o mundo assombrado pelos demônios',
                 'romancista_id': 1,
             }
-        ]
+        ],
+        'next_cursor': None,
+        'total': None,
     }
 
 
+def test_list_livro_etag(client, token, livro):
+    etag = client.get('/livro').headers['etag']
+
+    response = client.get('/livro', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.patch(
+        f'/livro/{livro.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': 1958},
+    )
+
+    response = client.get('/livro', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_livro_is_cached(session, client, livro):
+    client.get('/livro')
+
+    livro.titulo = 'alterado fora da api'
+    await session.commit()
+
+    response = client.get('/livro')
+    assert response.json()['livros'][0]['titulo'] == (
+        'o mundo assombrado pelos demônios'
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_livro_cache_invalidated_by_ano(
+    session, client, token, livro, other_livro
+):
+    livro_2000 = LivroFactory(ano=2000)
+    session.add(livro_2000)
+    await session.commit()
+    client.get('/livro/?ano=1999')
+
+    other_livro.titulo = 'alterado fora da api'
+    await session.commit()
+
+    client.patch(
+        f'/livro/{livro_2000.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'titulo': 'outro titulo'},
+    )
+    response = client.get('/livro/?ano=1999')
+    assert 'alterado fora da api' not in [
+        livro['titulo'] for livro in response.json()['livros']
+    ]
+
+    client.patch(
+        f'/livro/{livro.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': 1999},
+    )
+    response = client.get('/livro/?ano=1999')
+    assert 'alterado fora da api' in [
+        livro['titulo'] for livro in response.json()['livros']
+    ]
+
+
 def test_list_livro_empty(client, livro):
     response = client.get('/livro/?ano=8')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'livros': []}
+    assert response.json() == {
+        'livros': [],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
-def test_list_livro_should_return_3_livros(session, client, romancista):
+@pytest.mark.asyncio
+async def test_list_livro_should_return_3_livros(session, client, romancista):
     expected_livros = 3
-    session.bulk_save_objects(LivroFactory.create_batch(3))
-    session.commit()
+    session.add_all(LivroFactory.create_batch(3))
+    await session.commit()
     response = client.get('/livro')
     assert len(response.json()['livros']) == expected_livros
 
 
-def test_list_livro_offset(session, client, romancista):
-    session.bulk_save_objects(LivroFactory.create_batch(5))
-    session.commit()
+@pytest.mark.asyncio
+async def test_list_livro_offset(session, client, romancista):
+    session.add_all(LivroFactory.create_batch(5))
+    await session.commit()
     response = client.get('/livro/?offset=1')
     response_data = response.json()['livros']
     livro_id_1 = [livro['id'] == 1 for livro in response_data]
@@ -180,9 +340,214 @@ def test_list_livro_offset(session, client, romancista):
     assert not any(livro_id_1)
 
 
-def test_list_livro_limit_20(session, client, romancista):
+@pytest.mark.asyncio
+async def test_list_livro_limit_20(session, client, romancista):
     expected_livros = 20
-    session.bulk_save_objects(LivroFactory.create_batch(21))
-    session.commit()
+    session.add_all(LivroFactory.create_batch(21))
+    await session.commit()
     response = client.get('/livro')
     assert len(response.json()['livros']) == expected_livros
+
+
+@pytest.mark.asyncio
+async def test_list_livro_cursor(session, client, romancista):
+    session.add_all(LivroFactory.create_batch(5))
+    await session.commit()
+
+    ids = []
+    cursor = None
+    for _ in range(3):
+        params = {'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/livro/', params=params)
+        data = response.json()
+        ids += [livro['id'] for livro in data['livros']]
+        cursor = data['next_cursor']
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_list_livro_cursor_order_by_ano(session, client, romancista):
+    session.add_all(LivroFactory.create_batch(5))
+    await session.commit()
+
+    first = client.get('/livro/?limit=3&order_by=ano').json()
+    second = client.get(
+        '/livro/',
+        params={'order_by': 'ano', 'cursor': first['next_cursor']},
+    ).json()
+    livros = first['livros'] + second['livros']
+
+    assert [livro['ano'] for livro in livros] == sorted(
+        livro['ano'] for livro in livros
+    )
+    assert len({livro['id'] for livro in livros}) == 5  # noqa: PLR2004
+
+
+def test_list_livro_invalid_cursor(client):
+    response = client.get('/livro/?cursor=invalido')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor invalido'}
+
+
+@pytest.mark.parametrize(
+    ('order_by', 'values'),
+    [
+        ('id', [{'a': 1}]),
+        ('id', ['abc']),
+        ('id', [True]),
+        ('ano', [1.5, 1]),
+        ('titulo', [1, 1]),
+        ('titulo', ['abc', '1']),
+    ],
+)
+def test_list_livro_cursor_with_wrong_types(client, order_by, values):
+    response = client.get(
+        '/livro/',
+        params={
+            'order_by': order_by,
+            'cursor': encode_cursor(order_by, values),
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor invalido'}
+
+
+@pytest.mark.asyncio
+async def test_list_livro_cursor_from_other_order(session, client, romancista):
+    session.add_all(LivroFactory.create_batch(2))
+    await session.commit()
+    cursor = client.get('/livro/?limit=1').json()['next_cursor']
+
+    response = client.get(
+        '/livro/', params={'order_by': 'titulo', 'cursor': cursor}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_search_livro(session, client, romancista):
+    session.add_all([
+        Livro(ano=1999, titulo='mundo perdido', romancista_id=romancista.id),
+        Livro(ano=1999, titulo='o mundo', romancista_id=romancista.id),
+        Livro(ano=1999, titulo='duna', romancista_id=romancista.id),
+    ])
+    await session.commit()
+
+    response = client.get('/livro/search?q=MUNDO')
+    titulos = [livro['titulo'] for livro in response.json()['livros']]
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(titulos) == {'mundo perdido', 'o mundo'}
+
+
+def test_search_livro_sanitizes_term(client, livro):
+    response = client.get('/livro/search', params={'q': 'Assombrado!!'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item['id'] for item in response.json()['livros']] == [livro.id]
+
+
+def test_search_livro_empty_term(client, livro):
+    response = client.get('/livro/search', params={'q': '!!!'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'livros': [],
+        'next_cursor': None,
+        'total': None,
+    }
+
+
+def test_lookup_livro(client, livro, other_livro):
+    response = client.post(
+        '/livro/lookup', json={'ids': [other_livro.id, 99, livro.id, 99]}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item['id'] for item in response.json()['livros']] == [
+        other_livro.id,
+        livro.id,
+    ]
+    assert response.json()['missing'] == [99]
+
+
+def test_lookup_livro_empty_ids(client):
+    response = client.post('/livro/lookup', json={'ids': []})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_livro_with_total(session, client, romancista):
+    session.add_all(LivroFactory.create_batch(5, ano=1999))
+    await session.commit()
+
+    response = client.get('/livro/?ano=1999&limit=2&with_total=true')
+
+    assert len(response.json()['livros']) == 2  # noqa: PLR2004
+    assert response.json()['total'] == {'value': 5, 'kind': 'exact'}
+
+
+@pytest.mark.asyncio
+async def test_list_livro_with_total_over_threshold(
+    session, client, romancista, monkeypatch
+):
+    monkeypatch.setattr(settings, 'EXACT_COUNT_THRESHOLD', 2)
+    session.add_all(LivroFactory.create_batch(5))
+    await session.commit()
+
+    response = client.get('/livro/?limit=1&with_total=true')
+
+    assert response.json()['total']['value'] >= 3  # noqa: PLR2004
+
+
+def test_get_livro_by_id_expand_romancista(client, livro, romancista):
+    response = client.get(f'/livro/{livro.id}?expand=romancista')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': 1,
+        'ano': 1999,
+        'titulo': 'o mundo assombrado pelos demônios',
+        'romancista_id': 1,
+        'romancista': {'id': 1, 'nome': 'test'},
+    }
+    assert response.headers['etag'] != client.get('/livro/1').headers['etag']
+
+
+@pytest.mark.asyncio
+async def test_list_livro_by_romancista_expanded(
+    session, client, romancista, other_romancista
+):
+    session.add_all(LivroFactory.create_batch(2, romancista_id=1))
+    session.add_all(LivroFactory.create_batch(3, romancista_id=2))
+    await session.commit()
+
+    response = client.get('/livro/?romancista_id=2&expand=romancista')
+    livros = response.json()['livros']
+
+    assert len(livros) == 3  # noqa: PLR2004
+    assert {livro['romancista']['nome'] for livro in livros} == {'test1'}
+
+
+def test_list_livro_filter_skips_threadpool(client, monkeypatch):
+    calls = []
+    original = dependency_utils.run_in_threadpool
+
+    async def spy(func, *args, **kwargs):
+        calls.append(func)
+        return await original(func, *args, **kwargs)
+
+    monkeypatch.setattr(dependency_utils, 'run_in_threadpool', spy)
+
+    response = client.get('/livro/', params={'ano': 1999})
+
+    assert response.status_code == HTTPStatus.OK
+    assert FilterLivro not in calls
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+from madr.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(
+        Histogram('latency_seconds', 'Latencia', ('route',), buckets=(0.1, 1))
+    )
+
+    histogram.observe(0.05, '/a')
+    histogram.observe(0.5, '/a')
+    histogram.observe(3, '/a')
+
+    assert registry.render().splitlines() == [
+        '# HELP latency_seconds Latencia',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 1.0',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2.0',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3.0',
+        'latency_seconds_sum{route="/a"} 3.55',
+        'latency_seconds_count{route="/a"} 3.0',
+    ]
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.register(Counter('hits_total', 'Hits', ('path',)))
+
+    counter.inc('a"b\\c')
+
+    assert 'hits_total{path="a\\"b\\\\c"} 1.0' in registry.render()
+
+
+def test_metrics_endpoint(client, token):
+    client.get('/livro/999')
+    client.get('/nao-existe')
+    client.post(
+        '/auth/token', data={'username': 'nobody@x.com', 'password': 'x'}
+    )
+
+    response = client.get('/metrics')
+    body = response.text
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        'madr_http_requests_total'
+        '{method="GET",route="/livro/{livro_id}",status="404"}'
+    ) in body
+    assert (
+        'madr_http_requests_total{method="GET",route="unmatched",status="404"}'
+    ) in body
+    assert 'madr_http_request_duration_seconds_bucket{method="GET"' in body
+    assert 'madr_http_requests_in_progress 1.0' in body
+    assert 'madr_threadpool_threads{state="max"}' in body
+    assert 'madr_db_pool_connections{state="checked_out"}' in body
+    assert 'madr_db_pool_checkouts_total' in body
+    assert 'madr_password_hashing_seconds_count{operation=' in body
@@ -0,0 +1,81 @@
+import logging
+import re
+import time
+
+import pytest
+from sqlalchemy import select
+
+from madr.models import Livro
+from madr.profiling import settings
+from madr.schemas import LivroList, RomancistaList
+
+
+@pytest.fixture
+def _log_all_queries(monkeypatch):
+    monkeypatch.setattr(settings, 'SLOW_QUERY_MS', 0)
+    monkeypatch.setattr(settings, 'N_PLUS_ONE_THRESHOLD', 1)
+
+
+def test_server_timing_header(client, token, livro):
+    response = client.get(
+        '/livro/1', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert re.fullmatch(
+        r'db;dur=[\d.]+;desc="\d+ queries", auth;dur=[\d.]+, '
+        r'serialize;dur=[\d.]+, total;dur=[\d.]+',
+        response.headers['Server-Timing'],
+    )
+    assert not response.headers['Server-Timing'].startswith(
+        'db;dur=0.0;desc="0 queries"'
+    )
+
+
+@pytest.mark.parametrize(
+    ('path', 'model'),
+    [('/livro/', LivroList), ('/romancista/', RomancistaList)],
+)
+def test_server_timing_covers_list_serialization(
+    client, livro, monkeypatch, path, model
+):
+    validate = model.model_validate
+
+    def slow_validate(*args, **kwargs):
+        time.sleep(0.05)
+        return validate(*args, **kwargs)
+
+    monkeypatch.setattr(model, 'model_validate', slow_validate)
+
+    response = client.get(path)
+    serialize = re.search(
+        r'serialize;dur=([\d.]+)', response.headers['Server-Timing']
+    )
+
+    assert float(serialize.group(1)) >= 50  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures('_log_all_queries')
+def test_slow_and_repeated_queries_are_logged(client, livro, caplog):
+    with caplog.at_level(logging.WARNING, logger='madr.sql'):
+        client.get('/livro/1')
+
+    messages = [record.getMessage() for record in caplog.records]
+
+    assert any(
+        message.startswith('Consulta lenta')
+        and 'GET /livro/{livro_id}' in message
+        for message in messages
+    )
+    assert any(
+        message.startswith('Possivel N+1 em GET /livro/{livro_id}')
+        for message in messages
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('_log_all_queries')
+async def test_queries_outside_requests_are_ignored(session, caplog):
+    with caplog.at_level(logging.WARNING, logger='madr.sql'):
+        await session.scalar(select(Livro))
+
+    assert not caplog.records
@@ -0,0 +1,148 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr.cache import LocalStore
+from madr.hashing import hashing_pool
+from madr.ratelimit import MemoryBuckets, RateLimiter, SharedBuckets, settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    buckets = MemoryBuckets(maxsize=10)
+    buckets.clock = clock
+    limiter = RateLimiter(buckets)
+
+    assert [limiter.hit('ip:1', 3, 60) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit('ip:1', 3, 60) == 20  # noqa: PLR2004
+    assert limiter.hit('ip:2', 3, 60) == 0
+
+    clock.now += 20
+    assert limiter.hit('ip:1', 3, 60) == 0
+    assert limiter.hit('ip:1', 3, 60) > 0
+
+
+def test_memory_buckets_are_bounded_and_drop_idle_keys(clock):
+    buckets = MemoryBuckets(maxsize=2)
+    buckets.clock = clock
+    limiter = RateLimiter(buckets)
+
+    for key in ('a', 'b', 'c'):
+        limiter.hit(key, 5, 60)
+
+    assert len(buckets) == 2  # noqa: PLR2004
+    assert buckets.get('a') is None
+
+    clock.now += 60
+    limiter.hit('d', 5, 60)
+
+    assert len(buckets) == 1
+
+
+def test_shared_buckets_with_local_store(clock):
+    store = LocalStore()
+    buckets = SharedBuckets(store)
+    buckets.clock = clock
+    limiter = RateLimiter(buckets)
+
+    assert limiter.hit('account:x', 1, 60) == 0
+    assert limiter.hit('account:x', 1, 60) == 60  # noqa: PLR2004
+    assert store.get('madr:rl:account:x') == '1060.0'
+
+
+def test_login_is_limited_per_account_before_hashing(
+    client, user, monkeypatch
+):
+    calls = []
+    verify_and_update = hashing_pool.verify_and_update
+
+    async def counting(*args):
+        calls.append(args)
+        return await verify_and_update(*args)
+
+    monkeypatch.setattr(hashing_pool, 'verify_and_update', counting)
+    monkeypatch.setattr(settings, 'RATE_LIMIT_ACCOUNT_REQUESTS', 2)
+
+    statuses = [
+        client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': 'errada'},
+        ).status_code
+        for _ in range(3)
+    ]
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email.upper(), 'password': 'errada'},
+    )
+
+    assert statuses == [
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers['Retry-After']) > 0
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_create_user_is_limited_per_ip(client, monkeypatch):
+    monkeypatch.setattr(settings, 'RATE_LIMIT_IP_REQUESTS', 1)
+
+    first = client.post(
+        '/users/conta',
+        json={'username': 'a', 'email': 'a@a.com', 'password': '1'},
+    )
+    second = client.post(
+        '/users/conta',
+        json={'username': 'b', 'email': 'b@b.com', 'password': '1'},
+    )
+
+    assert first.status_code == HTTPStatus.CREATED
+    assert second.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert second.json() == {
+        'detail': 'Muitas tentativas, tente novamente mais tarde'
+    }
+
+
+def test_rate_limit_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, 'RATE_LIMIT_ENABLED', False)
+    monkeypatch.setattr(settings, 'RATE_LIMIT_IP_REQUESTS', 1)
+
+    statuses = {
+        client.post(
+            '/auth/token', data={'username': 'x@x.com', 'password': 'x'}
+        ).status_code
+        for _ in range(3)
+    }
+
+    assert statuses == {HTTPStatus.BAD_REQUEST}
+
+
+def test_ip_limit_uses_configured_client_ip_header(client, monkeypatch):
+    monkeypatch.setattr(settings, 'RATE_LIMIT_IP_REQUESTS', 1)
+    monkeypatch.setattr(
+        settings, 'RATE_LIMIT_CLIENT_IP_HEADER', 'Fly-Client-IP'
+    )
+
+    def login(ip):
+        return client.post(
+            '/auth/token',
+            headers={'Fly-Client-IP': ip},
+            data={'username': f'{ip}@x.com', 'password': 'x'},
+        ).status_code
+
+    assert login('203.0.113.1') == HTTPStatus.BAD_REQUEST
+    assert login('203.0.113.2') == HTTPStatus.BAD_REQUEST
+    assert login('203.0.113.1') == HTTPStatus.TOO_MANY_REQUESTS
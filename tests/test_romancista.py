@@ -1,6 +1,11 @@
 from http import HTTPStatus
 
-from tests.conftest import RomancistaFactory
+import pytest
+from fastapi.dependencies import utils as dependency_utils
+from sqlalchemy import event
+
+from benchmarks.factories import LivroFactory, RomancistaFactory
+from madr.schemas import FilterRomancista
 
 
 def test_create_romancista(client, token):
@@ -25,6 +30,36 @@ def test_create_romancista_with_romancista(client, token, romancista):
     assert response.json() == {'detail': 'Romancista ja costa no MADR'}
 
 
+def test_create_romancista_slugified_nome_conflict(client, token):
+    def create(nome):
+        return client.post(
+            '/romancista',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'nome': nome},
+        )
+
+    assert create('Cecília Meireles').status_code == HTTPStatus.CREATED
+
+    response = create('cecilia meireles')
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Romancista ja costa no MADR'}
+
+
+def test_patch_romancista_conflict_rolls_back(
+    session, client, token, romancista, other_romancista
+):
+    response = client.patch(
+        f'/romancista/{other_romancista.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'nome': romancista.nome},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    # No PostgreSQL a transação abortada quebraria as próximas consultas
+    assert not session.in_transaction()
+
+
 def test_delete_romancista(client, token, romancista):
     response = client.delete(
         f'/romancista/{romancista.id}',
@@ -35,6 +70,17 @@ def test_delete_romancista(client, token, romancista):
     assert response.json() == {'message': 'Romancista deletado(a) do MADR'}
 
 
+def test_delete_romancista_deletes_livros(client, token, romancista, livro):
+    client.delete(
+        f'/romancista/{romancista.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.get(f'/livro/{livro.id}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_delete_romacista_not_found(client, token, romancista):
     response = client.delete(
         '/romancista/99',
@@ -97,6 +143,50 @@ def test_get_romancista(client, romancista):
     assert response.json() == {'id': 1, 'nome': 'test'}
 
 
+def test_get_romancista_etag(client, romancista):
+    response = client.get(
+        f'/romancista/{romancista.id}',
+        headers={'If-None-Match': 'W/"romancista-1.1", "outro"'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == '"romancista-1.1"'
+
+
+def test_list_romancista_etag(client, romancista, other_romancista):
+    etag = client.get('/romancista').headers['etag']
+
+    response = client.get('/romancista', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(
+        '/romancista?limit=1', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_list_romancista_cache_invalidated(
+    session, client, token, romancista, other_romancista
+):
+    client.get('/romancista')
+
+    other_romancista.nome = 'alterado fora da api'
+    await session.commit()
+
+    response = client.get('/romancista')
+    assert response.json()['romancistas'][1]['nome'] != other_romancista.nome
+
+    client.patch(
+        f'/romancista/{romancista.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'nome': 'novo nome'},
+    )
+
+    response = client.get('/romancista')
+    assert response.json()['romancistas'][1]['nome'] == other_romancista.nome
+
+
 def test_get_romancista_not_found(client, romancista):
     response = client.get('/romancista/99')
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -106,35 +196,167 @@ def test_get_romancista_not_found(client, romancista):
 def test_list_romancista(client, romancista):
     response = client.get('/romancista/?nome=t')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'romancistas': [{'id': 1, 'nome': 'test'}]}
+    assert response.json() == {
+        'romancistas': [{'id': 1, 'nome': 'test'}],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
 def test_list_romancista_should_return_empty(client, romancista):
     response = client.get('/romancista/?nome=w')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'romancistas': []}
+    assert response.json() == {
+        'romancistas': [],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
-def test_list_romancista_should_return_3_romancistas(session, client):
+@pytest.mark.asyncio
+async def test_list_romancista_should_return_3_romancistas(session, client):
     expected_romancistas = 3
-    session.bulk_save_objects(RomancistaFactory.create_batch(3))
-    session.commit()
+    session.add_all(RomancistaFactory.create_batch(3))
+    await session.commit()
     response = client.get('/romancista')
     assert len(response.json()['romancistas']) == expected_romancistas
 
 
-def test_list_romancista_offset(session, client):
-    session.bulk_save_objects(RomancistaFactory.create_batch(5))
-    session.commit()
+@pytest.mark.asyncio
+async def test_list_romancista_offset(session, client):
+    session.add_all(RomancistaFactory.create_batch(5))
+    await session.commit()
     response = client.get('/romancista/?offset=1')
     response_data = response.json()['romancistas']
     romancista_id_1 = [romancista['id'] == 1 for romancista in response_data]
     assert not any(romancista_id_1)
 
 
-def test_list_romancista_limit_20(session, client):
+@pytest.mark.asyncio
+async def test_list_romancista_limit_20(session, client):
     expected_romancistas = 20
-    session.bulk_save_objects(RomancistaFactory.create_batch(21))
-    session.commit()
+    session.add_all(RomancistaFactory.create_batch(21))
+    await session.commit()
     response = client.get('/romancista')
     assert len(response.json()['romancistas']) == expected_romancistas
+
+
+@pytest.mark.asyncio
+async def test_list_romancista_cursor(session, client):
+    session.add_all(RomancistaFactory.create_batch(3))
+    await session.commit()
+
+    first = client.get('/romancista/?limit=2&order_by=nome').json()
+    second = client.get(
+        '/romancista/',
+        params={
+            'limit': 2,
+            'order_by': 'nome',
+            'cursor': first['next_cursor'],
+        },
+    ).json()
+    nomes = [
+        romancista['nome']
+        for romancista in first['romancistas'] + second['romancistas']
+    ]
+
+    assert nomes == sorted(nomes)
+    assert len(set(nomes)) == 3  # noqa: PLR2004
+    assert second['next_cursor'] is None
+
+
+def test_list_romancista_invalid_cursor(client):
+    response = client.get('/romancista/?cursor=e30=')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor invalido'}
+
+
+def test_search_romancista(client, romancista, other_romancista):
+    response = client.get('/romancista/search?q=test')
+    nomes = [item['nome'] for item in response.json()['romancistas']]
+
+    assert response.status_code == HTTPStatus.OK
+    assert nomes == ['test', 'test1']
+
+
+def test_search_romancista_not_found(client, romancista):
+    response = client.get('/romancista/search?q=zzz')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'romancistas': [],
+        'next_cursor': None,
+        'total': None,
+    }
+
+
+def test_lookup_romancista(client, romancista, other_romancista):
+    response = client.post(
+        '/romancista/lookup', json={'ids': [7, other_romancista.id, 1]}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'romancistas': [
+            {'nome': 'test1', 'id': other_romancista.id},
+            {'nome': 'test', 'id': romancista.id},
+        ],
+        'missing': [7],
+    }
+
+
+def test_get_romancista_expand_livros(client, romancista, livro, other_livro):
+    response = client.get(f'/romancista/{romancista.id}?expand=livros')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['nome'] == 'test'
+    assert [item['id'] for item in response.json()['livros']] == [
+        livro.id,
+        other_livro.id,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_romancista_expand_livros_bounded_queries(
+    session, client, engine
+):
+    session.add_all(RomancistaFactory.create_batch(5))
+    await session.commit()
+    session.add_all([
+        LivroFactory(romancista_id=romancista_id)
+        for romancista_id in range(1, 6)
+    ])
+    await session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    try:
+        response = client.get('/romancista/?expand=livros')
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    assert all(
+        len(item['livros']) == 1 for item in response.json()['romancistas']
+    )
+    assert len(statements) == 2  # noqa: PLR2004
+
+
+def test_list_romancista_filter_skips_threadpool(client, monkeypatch):
+    calls = []
+    original = dependency_utils.run_in_threadpool
+
+    async def spy(func, *args, **kwargs):
+        calls.append(func)
+        return await original(func, *args, **kwargs)
+
+    monkeypatch.setattr(dependency_utils, 'run_in_threadpool', spy)
+
+    response = client.get('/romancista/', params={'nome': 'test'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert FilterRomancista not in calls
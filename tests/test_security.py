@@ -4,10 +4,12 @@ import pytest
 from fastapi import HTTPException
 from jwt import decode, encode
 
+from madr.hashing import hashing_pool
 from madr.security import (
     create_access_token,
     get_current_user,
     get_password_hash,
+    principal_cache,
     verify_password,
 )
 from madr.settings import Settings
@@ -39,23 +41,109 @@ def test_jwt_invalid_token(client):
     assert response.json() == {'detail': 'Could not validate credentials'}
 
 
-def test_get_current_user_not_found(session):
+@pytest.mark.asyncio
+async def test_get_current_user_not_found(session):
     data = {'sub': 'None@none.com'}
     token = encode(data, Settings().SECRET_KEY, algorithm=Settings().ALGORITHM)
 
     with pytest.raises(HTTPException) as ex:
-        get_current_user(session, token)
+        await get_current_user(session, token)
 
     assert ex.value.status_code == HTTPStatus.UNAUTHORIZED
     assert ex.value.detail == 'Could not validate credentials'
 
 
-def test_get_current_user_without_sub(session):
+@pytest.mark.asyncio
+async def test_get_current_user_without_sub(session):
     data = {}
     token = encode(data, Settings().SECRET_KEY, algorithm=Settings().ALGORITHM)
 
     with pytest.raises(HTTPException) as ex:
-        get_current_user(session, token)
+        await get_current_user(session, token)
 
     assert ex.value.status_code == HTTPStatus.UNAUTHORIZED
     assert ex.value.detail == 'Could not validate credentials'
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_principal_cache(session, user):
+    token = create_access_token({'sub': user.email})
+
+    first = await get_current_user(session, token)
+    second = await get_current_user(session, token)
+
+    assert first.id == second.id == user.id
+    assert principal_cache.misses == 1
+    assert principal_cache.hits == 1
+
+
+def test_principal_cache_invalidated_on_delete_user(client, user, token):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    client.delete(
+        f'/users/conta/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_principal_cache_invalidated_on_update_user(client, user, token):
+    client.put(
+        f'/users/conta/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'test2',
+            'email': 'test2@test.com',
+            'password': '123',
+        },
+    )
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_principal_cache_cleared_after_update_commit(
+    client, user, token, monkeypatch
+):
+    hash_password = hashing_pool.hash
+    old_principal = {
+        'id': user.id,
+        'username': user.username,
+        'password': user.password,
+        'email': user.email,
+    }
+
+    async def hash_while_request_repopulates(password):
+        # Outra requisição com o token antigo relê a linha ainda não
+        # alterada enquanto o Argon2 roda.
+        principal_cache.set(old_principal['email'], old_principal)
+        return await hash_password(password)
+
+    monkeypatch.setattr(hashing_pool, 'hash', hash_while_request_repopulates)
+
+    client.put(
+        f'/users/conta/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'test2',
+            'email': 'test2@test.com',
+            'password': '123',
+        },
+    )
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert principal_cache.get(old_principal['email']) is None
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
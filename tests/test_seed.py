@@ -0,0 +1,58 @@
+import random
+
+import pytest
+from slugify import slugify
+from sqlalchemy import func, select
+
+from madr.models import Livro, LivrosPorAno, Romancista, User
+from madr.seed import (
+    SYLLABLES,
+    generate_nomes,
+    generate_titulos,
+    invented_word,
+    seed_database,
+)
+
+
+def test_invented_words_are_unique():
+    words = [invented_word(index) for index in range(1, 10000)]
+
+    assert words[:2] == ['ba', 'be']
+    assert words[len(SYLLABLES)] == 'baba'
+    assert len(set(words)) == len(words)
+
+
+def test_generated_values_are_already_slugified():
+    rng = random.Random(1)
+    values = generate_titulos(rng, 1, 500) + generate_nomes(rng, 1, 500)
+
+    assert all(slugify(value, separator=' ') == value for value in values)
+
+
+@pytest.mark.asyncio
+async def test_seed_database(session):
+    for _ in range(2):
+        counts = await seed_database(
+            session,
+            romancistas=5,
+            livros=40,
+            users=3,
+            password_hash='hash',
+            seed=1,
+            batch_size=7,
+        )
+
+    assert counts == {'romancistas': 5, 'livros': 40, 'users': 3}
+    assert await session.scalar(select(func.count(Romancista.id))) == 10  # noqa: PLR2004
+    assert await session.scalar(select(func.count(Livro.id))) == 80  # noqa: PLR2004
+    assert await session.scalar(select(func.count(User.id))) == 6  # noqa: PLR2004
+    assert await session.scalar(select(func.sum(LivrosPorAno.total))) == 80  # noqa: PLR2004
+    assert set(await session.scalars(select(User.password))) == {'hash'}
+
+
+@pytest.mark.asyncio
+async def test_seed_livros_requires_romancistas(session):
+    with pytest.raises(ValueError, match='Nenhum romancista'):
+        await seed_database(
+            session, romancistas=0, livros=1, users=0, password_hash='hash'
+        )
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr.schemas import LivroPublic
+from madr.serialization import dump_json, render, settings
+
+
+@pytest.fixture
+def _fast_json(monkeypatch):
+    monkeypatch.setattr(settings, 'FAST_JSON', True)
+
+
+def test_render_disabled_returns_content(livro):
+    assert render(LivroPublic, livro) is livro
+
+
+def test_dump_json_reads_orm_attributes(livro):
+    assert (
+        dump_json(LivroPublic, livro)
+        == (
+            '{"ano":1999,"titulo":"o mundo assombrado pelos demônios",'
+            '"romancista_id":1,"id":1}'
+        ).encode()
+    )
+
+
+@pytest.mark.parametrize(
+    'url',
+    [
+        '/livro/1',
+        '/livro/?ano=1999',
+        '/livro/search?q=mundo',
+        '/romancista/1',
+        '/romancista/?nome=test',
+    ],
+)
+def test_fast_json_keeps_wire_format(client, livro, monkeypatch, url):
+    expected = client.get(url)
+
+    monkeypatch.setattr(settings, 'FAST_JSON', True)
+    response = client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == expected.content
+    assert response.headers['content-type'] == 'application/json'
+    assert response.headers.get('etag') == expected.headers.get('etag')
+
+
+@pytest.mark.usefixtures('_fast_json')
+def test_fast_json_create_keeps_status_code(client, token):
+    response = client.post(
+        '/romancista',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'nome': 'clarice lispector'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {'nome': 'clarice lispector', 'id': 1}
@@ -0,0 +1,121 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr.models import LivrosPorAno
+from madr.stats import rebuild_stats
+
+
+def create_livro(client, token, ano, titulo, romancista_id=1):
+    return client.post(
+        '/livro',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': ano, 'titulo': titulo, 'romancista_id': romancista_id},
+    ).json()
+
+
+def test_stats_follow_livro_writes(client, token, romancista):
+    create_livro(client, token, 1999, 'livro um')
+    livro = create_livro(client, token, 1999, 'livro dois')
+    create_livro(client, token, 2001, 'livro tres')
+
+    client.patch(
+        f'/livro/{livro["id"]}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ano': 2001},
+    )
+    client.delete('/livro/1', headers={'Authorization': f'Bearer {token}'})
+
+    response = client.get('/stats/livros')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'livros': 2,
+        'por_ano': [{'ano': 2001, 'total': 2}],
+        'por_romancista': [{'romancista_id': 1, 'nome': 'test', 'total': 2}],
+    }
+
+
+def test_stats_follow_batch_and_romancista_delete(
+    client, token, romancista, other_romancista
+):
+    client.post(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'ano': 1999, 'titulo': 'livro um', 'romancista_id': 1},
+            {'ano': 1999, 'titulo': 'livro dois', 'romancista_id': 2},
+            {'ano': 2001, 'titulo': 'livro tres', 'romancista_id': 2},
+        ],
+    )
+    client.delete(
+        '/romancista/2', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get('/stats/livros')
+
+    assert response.json() == {
+        'livros': 1,
+        'por_ano': [{'ano': 1999, 'total': 1}],
+        'por_romancista': [{'romancista_id': 1, 'nome': 'test', 'total': 1}],
+    }
+
+
+def test_stats_follow_import(client, token, romancista):
+    client.post(
+        '/livro/import',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+        content=(
+            b'{"ano": 1999, "titulo": "um", "romancista": "test"}\n'
+            b'{"ano": 1999, "titulo": "dois", "romancista": "novo"}'
+        ),
+    )
+
+    response = client.get('/stats/livros')
+
+    assert response.json()['por_ano'] == [{'ano': 1999, 'total': 2}]
+    assert len(response.json()['por_romancista']) == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_rebuild_stats_fixes_drift(session, client, livro, other_livro):
+    session.add(LivrosPorAno(ano=1500, total=7))
+    await session.commit()
+
+    await rebuild_stats(session)
+
+    response = client.get('/stats/livros')
+
+    assert response.json() == {
+        'livros': 2,
+        'por_ano': [{'ano': 1999, 'total': 2}],
+        'por_romancista': [{'romancista_id': 1, 'nome': 'test', 'total': 2}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_romancista_delete_matches_rebuild(
+    session, client, token, romancista, other_romancista
+):
+    client.post(
+        '/livro/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'ano': 1999, 'titulo': 'livro um', 'romancista_id': 1},
+            {'ano': 1999, 'titulo': 'livro dois', 'romancista_id': 2},
+            {'ano': 2001, 'titulo': 'livro tres', 'romancista_id': 2},
+            {'ano': 2001, 'titulo': 'livro quatro', 'romancista_id': 2},
+        ],
+    )
+    client.delete(
+        '/romancista/2', headers={'Authorization': f'Bearer {token}'}
+    )
+    incremental = client.get('/stats/livros').json()
+
+    await rebuild_stats(session)
+
+    assert client.get('/stats/livros').json() == incremental
+    assert incremental['por_ano'] == [{'ano': 1999, 'total': 1}]